@@ -1,12 +1,31 @@
-import os
 import time
+MODULE_START = time.time() # before any other import, for the startup profile
+import os
 import json
 import threading
 import queue
 import concurrent.futures
 import logging
-from flask import Flask, jsonify, request
+import base64
+import math
+import mmap
+import resource
+import ctypes
+import ctypes.util
+import hashlib
+import zlib
+import struct
+import random
+import bisect
+import multiprocessing
+from multiprocessing import shared_memory
 import shutil
+import errno
+import sys
+IMPORT_SEC = {"stdlib": time.time() - MODULE_START}
+_t0 = time.perf_counter()
+from flask import Flask, Response, jsonify, request
+IMPORT_SEC["flask"] = time.perf_counter() - _t0
 
 # Configure Logging
 logging.basicConfig(
@@ -28,8 +47,61 @@ MODEL_FILE = os.environ.get("MODEL_FILE", "model.bin")
 # Internal flags
 USE_SYNTHETIC = os.environ.get("USE_SYNTHETIC", "false").lower() == "true"
 SYNTHETIC_SIZE_GB = float(os.environ.get("SYNTHETIC_SIZE_GB", "10.0"))
-CHUNK_SIZE_MB = int(os.environ.get("CHUNK_SIZE_MB", "100)) # 100MB chunks
+SYNTHETIC_CONTENT = os.environ.get("SYNTHETIC_CONTENT", "zeros").lower() # zeros, random
+CHUNK_SIZE_MB = int(os.environ.get("CHUNK_SIZE_MB", "100")) # 100MB chunks
 NUM_THREADS = int(os.environ.get("NUM_THREADS", "4"))
+BENCHMARK_MODE = os.environ.get("BENCHMARK_MODE", "stream").lower() # stream, safetensors, lazy_mmap, write, random_read, metadata, autotune, tiered_cache, stage
+ACCESS_ORDER = os.environ.get("ACCESS_ORDER", "") # lazy_mmap: JSON list of tensor names (file path); empty = header order
+WRITE_PATH = os.environ.get("WRITE_PATH", "") # write mode: target directory; empty = MOUNT_PATH/benchmark-writes
+WRITE_SIZE_GB = float(os.environ.get("WRITE_SIZE_GB", "1.0")) # write mode: total checkpoint size
+WRITE_FILES = int(os.environ.get("WRITE_FILES", "1")) # write mode: checkpoint shards
+WRITE_LAYOUT = os.environ.get("WRITE_LAYOUT", "sequential").lower() # sequential, parallel (NUM_THREADS pwrite parts per file)
+WRITE_FSYNC = os.environ.get("WRITE_FSYNC", "file").lower() # none, file, chunk
+WRITE_ATOMIC = os.environ.get("WRITE_ATOMIC", "true").lower() == "true" # write to .tmp, then rename into place
+WRITE_KEEP = os.environ.get("WRITE_KEEP", "false").lower() == "true" # keep the checkpoint after the run
+RANDOM_IO_KB = int(os.environ.get("RANDOM_IO_KB", "4")) # random_read mode: bytes per pread (4 - 1024 KB)
+RANDOM_DIST = os.environ.get("RANDOM_DIST", "uniform").lower() # random_read mode: uniform, zipf
+ZIPF_S = float(os.environ.get("ZIPF_S", "1.1")) # random_read mode: zipf skew; higher = hotter hot set
+RANDOM_DURATION_SEC = float(os.environ.get("RANDOM_DURATION_SEC", "30")) # random_read mode: run length
+METADATA_MAX_FILES = int(os.environ.get("METADATA_MAX_FILES", "0")) # metadata mode: files to stat/open; 0 = all
+AUTOTUNE_WINDOW_SEC = float(os.environ.get("AUTOTUNE_WINDOW_SEC", "2")) # autotune mode: measurement window per setting
+AUTOTUNE_MAX_SEC = float(os.environ.get("AUTOTUNE_MAX_SEC", "120")) # autotune mode: give up climbing after this long
+AUTOTUNE_START_CHUNK_MB = int(os.environ.get("AUTOTUNE_START_CHUNK_MB", "4"))
+AUTOTUNE_MAX_THREADS = int(os.environ.get("AUTOTUNE_MAX_THREADS", "64"))
+AUTOTUNE_MAX_CHUNK_MB = int(os.environ.get("AUTOTUNE_MAX_CHUNK_MB", "256"))
+AUTOTUNE_MIN_GAIN = float(os.environ.get("AUTOTUNE_MIN_GAIN", "0.05")) # a step must add 5% MB/s to be kept
+AUTOTUNE_MAX_LATENCY_GROWTH = float(os.environ.get("AUTOTUNE_MAX_LATENCY_GROWTH", "4")) # reject steps whose p99 per MB grows more
+CACHE_DIR = os.environ.get("CACHE_DIR", "/dev/shm/benchmark-cache") # tiered_cache mode: tmpfs (/dev/shm) or a local disk path
+CACHE_BLOCK_MB = int(os.environ.get("CACHE_BLOCK_MB", "16")) # tiered_cache mode: unit of caching and eviction
+CACHE_CAPACITY_MB = int(os.environ.get("CACHE_CAPACITY_MB", "0")) # tiered_cache mode: 0 = the memory budget
+CACHE_PASSES = int(os.environ.get("CACHE_PASSES", "3")) # tiered_cache mode: loads of the whole dataset
+CACHE_ORDER = os.environ.get("CACHE_ORDER", "repeat").lower() # tiered_cache mode: repeat (same file order), shuffle (per pass)
+STAGE_PATH = os.environ.get("STAGE_PATH", "/tmp/benchmark-stage") # stage mode: local directory the dataset is copied into
+STAGE_RANGE_MB = int(os.environ.get("STAGE_RANGE_MB", "64")) # stage mode: unit of parallel copy and of resume
+STAGE_KEEP = os.environ.get("STAGE_KEEP", "false").lower() == "true" # stage mode: keep the staged copy after the run
+READ_ENGINE = os.environ.get("READ_ENGINE", "buffered").lower() # buffered, pooled, ranged, mmap, direct, process, gcs
+READ_ENGINES = ("buffered", "pooled", "ranged", "mmap", "direct", "process", "gcs")
+POOL_BUFFERS = int(os.environ.get("POOL_BUFFERS", "0")) # 0 = queue depth + one per thread + one for the consumer
+MEMORY_BUDGET_MB = int(os.environ.get("MEMORY_BUDGET_MB", "0")) # bytes in flight; 0 = MEMORY_BUDGET_FRACTION of the cgroup limit
+MEMORY_BUDGET_FRACTION = float(os.environ.get("MEMORY_BUDGET_FRACTION", "0.5"))
+RANGE_SIZE_MB = int(os.environ.get("RANGE_SIZE_MB", "0")) # 0 = split each file evenly across threads
+SCHEDULER = os.environ.get("SCHEDULER", "fifo").lower() # fifo (discovery order), lpt (largest work first)
+PREFETCH = os.environ.get("PREFETCH", "none").lower() # none, willneed (posix_fadvise), warm (background reads)
+PREFETCH_WINDOW_MB = int(os.environ.get("PREFETCH_WINDOW_MB", "256")) # how far ahead of each reader's cursor
+PREFETCH_THREADS = int(os.environ.get("PREFETCH_THREADS", "0")) # warm: background readers; 0 = NUM_THREADS
+CACHE_BYPASS = os.environ.get("CACHE_BYPASS", "o_direct").lower() # direct engine: o_direct, fadvise
+CONSUMER_WORK = os.environ.get("CONSUMER_WORK", "none").lower() # none, crc32, sha256: CPU work per chunk
+GCS_BUCKET = os.environ.get("GCS_BUCKET", "") # gcs engine: bucket holding MODEL_FILE (object or prefix)
+GCS_ENDPOINT = os.environ.get("GCS_ENDPOINT", "") # empty = STORAGE_EMULATOR_HOST, else storage.googleapis.com
+GCS_PART_SIZE_MB = int(os.environ.get("GCS_PART_SIZE_MB", "32")) # bytes per ranged GET; 0 = split evenly across threads
+GCS_KEEPALIVE = os.environ.get("GCS_KEEPALIVE", "true").lower() == "true" # false = new connection per GET
+RESOURCE_SAMPLE_SEC = float(os.environ.get("RESOURCE_SAMPLE_SEC", "0.5")) # CPU / RSS sampling interval during a run
+STREAM_INTERVAL_SEC = float(os.environ.get("STREAM_INTERVAL_SEC", "1.0")) # default /stream progress interval
+USE_GPU = os.environ.get("USE_GPU", "auto").lower() # auto (only if an NVIDIA device exists), true, false
+VERIFY = os.environ.get("VERIFY", "false").lower() == "true"
+VERIFY_THREADS = int(os.environ.get("VERIFY_THREADS", "0")) # 0 = NUM_THREADS
+VERIFY_MANIFEST = os.environ.get("VERIFY_MANIFEST", "") # JSON {relative path: crc32c (GCS base64 or int)}
+VERIFY_BUCKET = os.environ.get("VERIFY_BUCKET", "") # read expected crc32c from GCS object metadata
 
 # Global State
 STATE = {
@@ -38,9 +110,30 @@ STATE = {
         "mount_path": MOUNT_PATH,
         "model_file": MODEL_FILE,
         "use_synthetic": USE_SYNTHETIC,
+        "synthetic_content": SYNTHETIC_CONTENT,
         "threads": NUM_THREADS,
+        "chunk_size_mb": CHUNK_SIZE_MB,
+        "mode": BENCHMARK_MODE,
+        "engine": READ_ENGINE,
+        "range_size_mb": RANGE_SIZE_MB,
+        "scheduler": SCHEDULER,
+        "prefetch": PREFETCH,
+        "prefetch_window_mb": PREFETCH_WINDOW_MB,
+        "cache_bypass": CACHE_BYPASS,
+        "gcs_bucket": GCS_BUCKET,
+        "gcs_part_size_mb": GCS_PART_SIZE_MB,
+        "gcs_keepalive": GCS_KEEPALIVE,
+        "consumer_work": CONSUMER_WORK,
+        "verify": VERIFY,
+        "write_layout": WRITE_LAYOUT,
+        "write_fsync": WRITE_FSYNC,
+        "write_atomic": WRITE_ATOMIC,
+        "random_io_kb": RANDOM_IO_KB,
+        "random_dist": RANDOM_DIST,
+        "random_duration_sec": RANDOM_DURATION_SEC,
         "gpu_available": False
     },
+    "startup": {},
     "metrics": {
         "start_time": 0,
         "end_time": 0,
@@ -48,92 +141,2923 @@ STATE = {
         "total_bytes": 0,
         "throughput_mb_s": 0,
         "vram_used_gb": 0,
-        "files_processed": 0
+        "discovery_sec": 0,
+        "files_processed": 0,
+        "chunks_processed": 0,
+        "allocation": {},
+        "reassembly": {},
+        "page_faults": {},
+        "cache": {},
+        "read_stats": {},
+        "consumer_work": {},
+        "verification": {},
+        "mode_details": {},
+        "workers": {},
+        "gcs": {},
+        "prefetch": {},
+        "resources": {},
+        "memory_budget": {}
     },
-    "error": None
+    "error": None,
+    "sweep": None
 }
 
-# GPU Check
+# Optional: hardware crc32c (ships with google-cloud-storage)
+_t0 = time.perf_counter()
 try:
-    import torch
-    if torch.cuda.is_available():
-        STATE["config"]["gpu_available"] = True
+    import google_crc32c
+    HAS_CRC32C = True
 except ImportError:
-    pass
+    HAS_CRC32C = False
+IMPORT_SEC["google_crc32c"] = time.perf_counter() - _t0
+
+# Heavy optional modules are imported on first use, not at startup: every
+# second here is billed on each Cloud Run cold start.
+np = None
+torch = None
+
+def load_numpy():
+    """Imports numpy on first use; returns None if it is not installed."""
+    global np
+    if np is None and "numpy" not in IMPORT_SEC:
+        t0 = time.perf_counter()
+        try:
+            import numpy as np
+        except ImportError:
+            pass
+        IMPORT_SEC["numpy"] = time.perf_counter() - t0
+    return np
+
+def load_torch():
+    """Imports torch once a run may use the GPU and sets gpu_available.
+
+    With USE_GPU=auto torch is only imported when an NVIDIA device node
+    exists, so CPU-only instances never pay for it.
+    """
+    global torch
+    if torch is not None or "torch" in IMPORT_SEC:
+        return torch
+    if USE_GPU == "false" or (USE_GPU == "auto" and not os.path.exists("/dev/nvidiactl")):
+        return None
+    t0 = time.perf_counter()
+    try:
+        import torch
+        STATE["config"]["gpu_available"] = torch.cuda.is_available()
+    except ImportError:
+        pass
+    IMPORT_SEC["torch"] = time.perf_counter() - t0
+    logger.info(f"Imported torch in {IMPORT_SEC['torch']:.2f}s")
+    return torch
 
 # Metric Storage
 KEPT_DATA = [] # To prevent GC if needed, or we just discard
 
-def perform_benchmark():
+# --- Pipeline Buffers ---
+class Chunk:
+    """A unit of work on the pipeline queue.
+
+    `data` is any bytes-like object. Producers that lend out recycled
+    buffers pass `release`, which the consumer calls via `done()` once it
+    no longer needs the data.
+    """
+    __slots__ = ("data", "path", "offset", "release")
+
+    def __init__(self, data, path=None, offset=0, release=None):
+        self.data = data
+        self.path = path
+        self.offset = offset
+        self.release = release
+
+    def done(self):
+        if self.release is not None:
+            self.release()
+            self.release = None
+
+class BufferRing:
+    """Fixed set of preallocated buffers handed out round-robin.
+
+    Slots are allocated once up front, so steady-state chunk production
+    does not touch the allocator. `acquire()` blocks until the consumer
+    has returned a slot, which also bounds memory to count * size.
+    """
+
+    def __init__(self, count, size, content="zeros", aligned=False):
+        self.size = size
+        self.count = count
+        if aligned:
+            # Anonymous mappings are page aligned, as O_DIRECT requires.
+            self._buffers = [mmap.mmap(-1, size) for _ in range(count)]
+        else:
+            self._buffers = [bytearray(size) for _ in range(count)]
+        if content == "random":
+            # Generate once and copy into every slot; urandom per chunk
+            # would dominate the measurement just like b'0' * size did.
+            block = os.urandom(size)
+            for buf in self._buffers:
+                buf[:] = block
+        elif content != "zeros":
+            raise ValueError(f"Unknown buffer content: {content}")
+        self._views = [memoryview(buf) for buf in self._buffers]
+        self._free = queue.Queue()
+        for i in range(count):
+            self._free.put(i)
+        self._wait_lock = threading.Lock()
+        self.wait = 0.0 # seconds producers spent waiting for a free slot
+
+    def acquire(self, stop_event=None):
+        """Returns (slot, memoryview), or None if stop_event was set while waiting."""
+        t0 = time.perf_counter()
+        try:
+            while True:
+                try:
+                    idx = self._free.get(timeout=0.5)
+                    return idx, self._views[idx]
+                except queue.Empty:
+                    if stop_event is not None and stop_event.is_set():
+                        return None
+        finally:
+            waited = time.perf_counter() - t0
+            with self._wait_lock:
+                self.wait += waited
+
+    def release(self, idx):
+        self._free.put(idx)
+
+class ByteBudget:
+    """Bounds the bytes read but not yet consumed, across all producers.
+
+    Producers acquire a chunk's worth before reading and the consumer
+    releases it when done with the chunk, so memory in flight stays under
+    `limit` however many threads and however large the chunks. A request
+    bigger than the whole budget is let through when nothing else is in
+    flight, so oversized chunks degrade to one at a time instead of hanging.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_flight = 0
+        self.peak = 0
+        self.throttled = 0.0
+        self.throttle_events = 0
+        self._cond = threading.Condition()
+
+    def _fits(self, n):
+        return self.in_flight + n <= self.limit or self.in_flight == 0
+
+    def acquire(self, n, stop_event=None):
+        """Blocks until `n` bytes fit; returns False if stop_event was set while waiting."""
+        with self._cond:
+            if not self._fits(n):
+                t0 = time.perf_counter()
+                self.throttle_events += 1
+                try:
+                    while not self._fits(n):
+                        if stop_event is not None and stop_event.is_set():
+                            return False
+                        self._cond.wait(0.5)
+                finally:
+                    self.throttled += time.perf_counter() - t0
+            self.in_flight += n
+            self.peak = max(self.peak, self.in_flight)
+            return True
+
+    def release(self, n):
+        with self._cond:
+            self.in_flight -= n
+            self._cond.notify_all()
+
+def memory_limit():
+    """(bytes, source) for the container's memory limit: cgroup v2, cgroup v1, then physical RAM."""
+    for path, source in (("/sys/fs/cgroup/memory.max", "cgroup_v2"),
+                         ("/sys/fs/cgroup/memory/memory.limit_in_bytes", "cgroup_v1")):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        if value != "max" and int(value) < 1 << 60: # v1 reports "unlimited" as a huge number
+            return int(value), source
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES"), "physical"
+
+def memory_budget():
+    """(bytes, source) for MEMORY_BUDGET_MB, or a fraction of the memory limit."""
+    if MEMORY_BUDGET_MB:
+        return MEMORY_BUDGET_MB * 1024 * 1024, "MEMORY_BUDGET_MB"
+    limit, source = memory_limit()
+    return int(limit * MEMORY_BUDGET_FRACTION), f"{MEMORY_BUDGET_FRACTION:g} x {source}"
+
+def pread_into(fd, view, offset):
+    """Fills `view` from `fd` at `offset`; returns bytes read (short only at EOF)."""
+    n = 0
+    while n < len(view):
+        got = os.preadv(fd, [view[n:]], offset + n)
+        if not got: break
+        n += got
+    return n
+
+# --- Page Cache ---
+_LOW_BIT = bytes(b & 1 for b in range(256))
+_libc = None
+
+def _get_libc():
+    global _libc
+    if _libc is None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        libc.mmap.restype = ctypes.c_void_p
+        libc.mmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_long]
+        libc.munmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+        libc.mincore.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_void_p]
+        _libc = libc
+    return _libc
+
+def fd_resident_pages(fd, offset, length):
+    """Pages of [offset, offset + length) of an open file in the page cache, via mincore."""
+    libc = _get_libc()
+    start = offset - offset % mmap.PAGESIZE # mmap offsets must be page aligned
+    length += offset - start
+    addr = libc.mmap(None, length, mmap.PROT_READ, mmap.MAP_SHARED, fd, start)
+    if addr is None or addr == ctypes.c_void_p(-1).value:
+        raise OSError(ctypes.get_errno(), "mmap failed")
+    try:
+        vec = (ctypes.c_ubyte * -(-length // mmap.PAGESIZE))()
+        if libc.mincore(addr, length, vec) != 0:
+            raise OSError(ctypes.get_errno(), "mincore failed")
+        # Only the low bit is defined; the rest are reserved.
+        return bytes(vec).translate(_LOW_BIT).count(1)
+    finally:
+        libc.munmap(addr, length)
+
+def page_cache_resident_bytes(path, size, window=1 << 30):
+    """Returns how many bytes of `path` are in the page cache, via mincore."""
+    if not size:
+        return 0
+    resident_pages = 0
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        for start in range(0, size, window):
+            try:
+                resident_pages += fd_resident_pages(fd, start, min(window, size - start))
+            except OSError as e:
+                raise OSError(e.errno, f"{e.strerror} for {path}")
+    finally:
+        os.close(fd)
+    return min(size, resident_pages * mmap.PAGESIZE)
+
+def probe_residency(file_sizes):
+    """Fraction of the dataset already in the page cache, or None if mincore is unavailable."""
+    total = sum(file_sizes.values())
+    if not total:
+        return None
+    try:
+        resident = sum(page_cache_resident_bytes(fp, size) for fp, size in file_sizes.items())
+    except (OSError, AttributeError) as e:
+        logger.warning(f"Page cache probe unavailable: {e}")
+        return None
+    return resident / total
+
+def cache_label(resident_fraction, bypass=None):
+    """Labels a run cold, warm or mixed from its pre-run page cache residency."""
+    if bypass:
+        return "cold"
+    if resident_fraction is None:
+        return "unknown"
+    if resident_fraction <= 0.05:
+        return "cold"
+    if resident_fraction >= 0.95:
+        return "warm"
+    return "mixed"
+
+def drop_cache(fd, offset=0, length=0):
+    os.posix_fadvise(fd, offset, length, os.POSIX_FADV_DONTNEED)
+
+class Prefetcher:
+    """Keeps a window ahead of every reader's cursor moving into the page cache.
+
+    `willneed` hands each new stretch of the window to the kernel with
+    posix_fadvise and returns at once; `warm` preads it on background
+    threads into scratch buffers. Before each chunk the reader also asks
+    mincore how much of it is already resident, so the report shows how
+    much of the load the prefetch actually overlapped with consumption.
+    """
+
+    def __init__(self, mode, window, threads):
+        if mode not in ("willneed", "warm"):
+            raise ValueError(f"Unknown prefetch mode: {mode}")
+        self.mode = mode
+        self.window = window
+        self.threads = threads if mode == "warm" else 0
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=threads, thread_name_prefix="prefetch") if mode == "warm" else None
+        self.stop_event = threading.Event()
+        self.probe = True
+        self.issued = 0
+        self.warmed = 0
+        self.warm_sec = 0.0
+        self.late = 0
+        self.consumed = 0
+        self.resident = 0
+        self._scratch = threading.local()
+        self._lock = threading.Lock()
+
+    def cursor(self, fd, start, end):
+        """Per file (or range) state; call `before_read` ahead of each chunk and `close` when done."""
+        return PrefetchCursor(self, fd, start, end)
+
+    def _warm(self, cursor, offset, length):
+        try:
+            if self.stop_event.is_set() or offset + length <= cursor.position:
+                with self._lock:
+                    self.late += length # the reader got there first
+                return
+            buf = getattr(self._scratch, "buf", None)
+            if buf is None or len(buf) < length:
+                buf = self._scratch.buf = bytearray(length)
+            t0 = time.perf_counter()
+            n = pread_into(cursor.warm_fd, memoryview(buf)[:length], offset)
+            with self._lock:
+                self.warmed += n
+                self.warm_sec += time.perf_counter() - t0
+        finally:
+            cursor.task_done()
+
+    def observe(self, fd, offset, length):
+        if not self.probe:
+            return
+        try:
+            resident = min(length, fd_resident_pages(fd, offset, length) * mmap.PAGESIZE)
+        except (OSError, AttributeError) as e:
+            logger.warning(f"Prefetch coverage probe unavailable: {e}")
+            self.probe = False
+            return
+        with self._lock:
+            self.consumed += length
+            self.resident += resident
+
+    def close(self):
+        self.stop_event.set()
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
+
+    def report(self):
+        return {
+            "mode": self.mode,
+            "window_mb": self.window / 1024**2,
+            "threads": self.threads,
+            "issued_bytes": self.issued,
+            "warmed_bytes": self.warmed if self.mode == "warm" else None,
+            "warm_sec": self.warm_sec if self.mode == "warm" else None,
+            "late_bytes": self.late if self.mode == "warm" else None,
+            # Fraction of consumed bytes already in the page cache when the
+            # reader asked for them: the overlap the prefetch bought.
+            "coverage": self.resident / self.consumed if self.consumed else None,
+            "probed_bytes": self.consumed,
+        }
+
+class PrefetchCursor:
+    """One reader's position in one file, and how far ahead of it has been issued."""
+
+    def __init__(self, prefetcher, fd, start, end):
+        self.prefetcher = prefetcher
+        self.fd = fd
+        self.end = end
+        self.position = start
+        self.ahead = start
+        self.closed = False
+        self.pending = 0
+        self.warm_fd = os.dup(fd) if prefetcher.mode == "warm" else None # outlives the reader's fd
+        self._lock = threading.Lock()
+
+    def before_read(self, offset, length):
+        """Records the chunk's residency, then extends the window past it."""
+        p = self.prefetcher
+        self.position = offset
+        if offset >= self.end:
+            return
+        p.observe(self.fd, offset, min(length, self.end - offset))
+        lo = max(self.ahead, offset + length)
+        hi = min(self.end, offset + length + p.window)
+        if hi <= lo:
+            return
+        self.ahead = hi
+        with p._lock:
+            p.issued += hi - lo
+        if p.mode == "willneed":
+            os.posix_fadvise(self.fd, lo, hi - lo, os.POSIX_FADV_WILLNEED)
+            return
+        # Chunk-sized pieces, in order, so the nearest bytes are warmed first
+        for start in range(lo, hi, length):
+            with self._lock:
+                self.pending += 1
+            try:
+                p.pool.submit(p._warm, self, start, min(length, hi - start))
+            except RuntimeError: # pool shut down: the run is over
+                self.task_done()
+                break
+
+    def task_done(self):
+        with self._lock:
+            self.pending -= 1
+            last = self.closed and self.pending == 0
+        if last:
+            os.close(self.warm_fd)
+
+    def close(self):
+        self.position = self.end
+        if self.warm_fd is None:
+            return
+        with self._lock:
+            self.closed = True
+            last = self.pending == 0
+        if last:
+            os.close(self.warm_fd)
+
+def plan_ranges(target_files, file_sizes, range_size, chunk_size, workers):
+    """Splits files into (path, start, end) byte ranges.
+
+    With range_size 0 each file is divided evenly across workers, rounded
+    up to whole chunks, so a single large file still keeps every worker
+    busy with one long sequential stream.
+    """
+    ranges = []
+    for fp in target_files:
+        size = file_sizes[fp]
+        step = range_size
+        if not step:
+            per_worker = -(-size // max(1, workers))
+            step = max(chunk_size, -(-per_worker // chunk_size) * chunk_size)
+        for start in range(0, size, step):
+            ranges.append((fp, start, min(size, start + step)))
+    return ranges
+
+def plan_lpt(target_files, file_sizes, range_size, chunk_size, workers):
+    """Longest-processing-time-first work list for mixed file sizes.
+
+    Without an explicit range size, pieces are capped at roughly a quarter
+    of a worker's fair share of the whole dataset, so one 10 GB shard is
+    split finely enough to balance against many small files. Largest
+    pieces go first; small files fill in the tail.
+    """
+    if not range_size:
+        share = -(-sum(file_sizes.values()) // (max(1, workers) * 4))
+        range_size = max(chunk_size, -(-share // chunk_size) * chunk_size)
+    ranges = plan_ranges(target_files, file_sizes, range_size, chunk_size, workers)
+    ranges.sort(key=lambda r: r[2] - r[1], reverse=True)
+    return ranges
+
+class WorkerTimes:
+    """Busy time per worker for one run; idle is whatever is left of the wall clock."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.busy = {}
+        self.tasks = {}
+        self.finished = {}
+
+    def add(self, worker, seconds, tasks=1):
+        with self._lock:
+            self.busy[worker] = self.busy.get(worker, 0.0) + seconds
+            self.tasks[worker] = self.tasks.get(worker, 0) + tasks
+            self.finished[worker] = time.time()
+
+    def timed(self, fn):
+        """Wraps a task so its duration counts as busy time for the calling thread."""
+        def run(*args):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                self.add(threading.current_thread().name, time.perf_counter() - t0)
+        return run
+
+    def report(self, start, end):
+        wall = max(end - start, 1e-9)
+        workers = [
+            {
+                "worker": w,
+                "tasks": self.tasks[w],
+                "busy_sec": busy,
+                "idle_sec": max(0.0, wall - busy),
+                "utilization": min(1.0, busy / wall),
+                "finished_after_sec": self.finished[w] - start,
+            }
+            for w, busy in sorted(self.busy.items())
+        ]
+        finished = [w["finished_after_sec"] for w in workers]
+        return {
+            "workers": workers,
+            # Gap between the first and the last worker running out of work
+            "tail_sec": (max(finished) - min(finished)) if finished else 0.0,
+            "mean_utilization": (sum(w["utilization"] for w in workers) / len(workers)) if workers else 0.0,
+        }
+
+class ReassemblyTracker:
+    """Tracks how far each file can be reassembled in order from tagged chunks.
+
+    Chunks that arrive ahead of a file's contiguous watermark are parked
+    (by offset and length only) until the gap before them is filled, which
+    shows how much reorder buffering an in-order loader would need.
+    """
+
+    def __init__(self, file_sizes):
+        self.file_sizes = file_sizes
+        self.watermarks = {fp: 0 for fp in file_sizes}
+        self.pending = {fp: {} for fp in file_sizes}
+        self.pending_bytes = 0
+        self.max_pending_bytes = 0
+        self.out_of_order_chunks = 0
+        self.files_complete = sum(1 for size in file_sizes.values() if size == 0)
+
+    def add(self, path, offset, length):
+        """Records a chunk; returns True if it completed its file."""
+        pending = self.pending[path]
+        if offset != self.watermarks[path]:
+            self.out_of_order_chunks += 1
+            pending[offset] = length
+            self.pending_bytes += length
+            self.max_pending_bytes = max(self.max_pending_bytes, self.pending_bytes)
+            return False
+        mark = offset + length
+        while mark in pending:
+            n = pending.pop(mark)
+            self.pending_bytes -= n
+            mark += n
+        self.watermarks[path] = mark
+        if mark >= self.file_sizes[path]:
+            self.files_complete += 1
+            return True
+        return False
+
+    def report(self):
+        return {
+            "files_complete": self.files_complete,
+            "files_total": len(self.file_sizes),
+            "out_of_order_chunks": self.out_of_order_chunks,
+            "max_reorder_buffer_mb": self.max_pending_bytes / 1024**2,
+            "in_order": all(self.watermarks[fp] >= size for fp, size in self.file_sizes.items()),
+        }
+
+# --- Read Statistics ---
+class LatencyHistogram:
+    """Log-linear histogram of durations, SUB_BUCKETS buckets per power of two microseconds."""
+    SUB_BUCKETS = 4
+    NUM_BUCKETS = SUB_BUCKETS * 36 # up to 2**36 us, roughly 19 hours
+
+    def __init__(self):
+        self.counts = [0] * self.NUM_BUCKETS
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    @classmethod
+    def bucket_for(cls, seconds):
+        us = seconds * 1e6
+        if us <= 1:
+            return 0
+        return min(cls.NUM_BUCKETS - 1, math.ceil(math.log2(us) * cls.SUB_BUCKETS))
+
+    @classmethod
+    def upper_bound(cls, idx):
+        """Upper edge of bucket `idx`, in seconds."""
+        return 2 ** (idx / cls.SUB_BUCKETS) / 1e6
+
+    def record(self, seconds):
+        self.counts[self.bucket_for(seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other):
+        for i, c in enumerate(other.counts):
+            if c:
+                self.counts[i] += c
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return min(self.upper_bound(i), self.max)
+        return self.max
+
+    def summary_ms(self):
+        return {
+            "count": self.count,
+            "mean": (self.sum / self.count * 1000) if self.count else 0.0,
+            "p50": self.quantile(0.50) * 1000,
+            "p90": self.quantile(0.90) * 1000,
+            "p99": self.quantile(0.99) * 1000,
+            "max": self.max * 1000,
+        }
+
+class ThreadReadStats:
+    """Counters owned by a single reader thread, so recording needs no lock."""
+    __slots__ = ("name", "start", "bytes", "chunks", "per_second", "latency")
+
+    def __init__(self, name, start):
+        self.name = name
+        self.start = start
+        self.bytes = 0
+        self.chunks = 0
+        self.per_second = [] # bytes completed in each second since start
+        self.latency = LatencyHistogram()
+
+    def record(self, nbytes, seconds):
+        sec = max(0, int(time.time() - self.start))
+        per_second = self.per_second
+        if sec >= len(per_second):
+            per_second.extend([0] * (sec + 1 - len(per_second)))
+        per_second[sec] += nbytes
+        self.bytes += nbytes
+        self.chunks += 1
+        self.latency.record(seconds)
+
+class ReadStats:
+    """Registry of per-thread read counters, merged only when reported."""
+
+    def __init__(self):
+        self.reset(time.time())
+
+    def reset(self, start):
+        self.start = start
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._sources = {}
+
+    def record(self, nbytes, seconds, source=None):
+        """Records a chunk for the calling thread, or for `source` (e.g. a worker
+        process) when one thread records on behalf of others."""
+        if source is not None:
+            stats = self._sources.get(source)
+            if stats is None:
+                stats = self._register(source)
+                self._sources[source] = stats
+            stats.record(nbytes, seconds)
+            return
+        stats = getattr(self._local, "stats", None)
+        if stats is None:
+            stats = self._register(threading.current_thread().name)
+            self._local.stats = stats
+        stats.record(nbytes, seconds)
+
+    def _register(self, name):
+        stats = ThreadReadStats(name, self.start)
+        with self._lock:
+            self._threads.append(stats)
+        return stats
+
+    def threads(self):
+        with self._lock:
+            return list(self._threads)
+
+    def merged(self):
+        threads = self.threads()
+        latency = LatencyHistogram()
+        per_second = []
+        for t in threads:
+            latency.merge(t.latency)
+            series = list(t.per_second)
+            if len(series) > len(per_second):
+                per_second.extend([0] * (len(series) - len(per_second)))
+            for i, b in enumerate(series):
+                per_second[i] += b
+        return threads, latency, per_second
+
+    def summary(self):
+        threads, latency, per_second = self.merged()
+        return {
+            "interval_sec": 1,
+            "throughput_mb_s": [round(b / 1024**2, 2) for b in per_second],
+            "chunk_read_latency_ms": latency.summary_ms(),
+            "per_thread": [
+                {"thread": t.name, "bytes": t.bytes, "chunks": t.chunks,
+                 "p99_ms": t.latency.quantile(0.99) * 1000}
+                for t in threads
+            ],
+        }
+
+READ_STATS = ReadStats()
+
+# --- Resource Accounting ---
+
+class TimedQueue(queue.Queue):
+    """queue.Queue that adds up how long callers block in put() and get()."""
+
+    def __init__(self, maxsize=0):
+        super().__init__(maxsize)
+        self._wait_lock = threading.Lock()
+        self.put_wait = 0.0
+        self.get_wait = 0.0
+        self.putters = set()
+
+    def put(self, item, block=True, timeout=None):
+        t0 = time.perf_counter()
+        super().put(item, block, timeout)
+        waited = time.perf_counter() - t0
+        with self._wait_lock:
+            self.put_wait += waited
+            if item is not None: # the end-of-stream sentinel is not a producer
+                self.putters.add(threading.get_ident())
+
+    def get(self, block=True, timeout=None):
+        t0 = time.perf_counter()
+        item = super().get(block, timeout)
+        waited = time.perf_counter() - t0
+        with self._wait_lock:
+            self.get_wait += waited
+        return item
+
+def thread_cpu_times():
+    """{native thread id: CPU seconds} for every thread of this process, from /proc."""
+    times = {}
+    tick = os.sysconf("SC_CLK_TCK")
+    try:
+        tids = os.listdir("/proc/self/task")
+    except OSError:
+        return times
+    for tid in tids:
+        try:
+            with open(f"/proc/self/task/{tid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            times[int(tid)] = (int(fields[11]) + int(fields[12])) / tick # utime + stime
+        except (OSError, ValueError, IndexError):
+            pass # thread exited while listing
+    return times
+
+def bottleneck_verdict(put_wait, get_wait, producers, duration):
+    """Names the stage that limited a pipeline run from its queue wait times.
+
+    `put_wait` is everything producers spent blocked handing data on:
+    q.put plus waiting for a free pooled buffer.
+
+    A consumer that (almost) never waits on q.get always had work, so it
+    set the pace. One starved on an empty queue while producers flowed
+    freely was waiting for reads. Both sides waiting a lot means the
+    hand-off itself (queue depth, buffer pool) throttles the pipeline.
+    """
+    if not duration:
+        return "unknown", "no measured duration"
+    producer_blocked = put_wait / (duration * max(1, producers))
+    consumer_starved = get_wait / duration
+    reason = f"producers blocked {producer_blocked:.0%} of the time handing off chunks, consumer waited {consumer_starved:.0%} on q.get"
+    if consumer_starved < 0.1:
+        return "consumer_bound", reason
+    if producer_blocked >= 0.2 and consumer_starved >= 0.2:
+        return "queue_bound", reason
+    if consumer_starved >= 0.5:
+        return "io_bound", reason
+    return "balanced", reason
+
+def worker_verdict(read_sec, work_sec):
+    """Verdict for the process engine, where each worker reads a chunk and
+    then does the per-chunk work itself.
+
+    The parent's queue only sees one collector thread, so its wait times
+    say nothing about the CPU spent in the workers. Instead this compares
+    how the workers split their busy time between pread and work.
+    """
+    busy = read_sec + work_sec
+    if not busy:
+        return "unknown", "worker processes reported no busy time"
+    work_share = work_sec / busy
+    reason = f"worker processes spent {work_share:.0%} of their busy time on per-chunk work, {1 - work_share:.0%} reading"
+    if work_share >= 0.6:
+        return "consumer_bound", reason
+    if work_share <= 0.4:
+        return "io_bound", reason
+    return "balanced", reason
+
+class ResourceSampler:
+    """Samples CPU, RSS and per-thread CPU in the background during a run.
+
+    Per-thread CPU comes from /proc/self/task; a thread that exits between
+    samples loses at most one interval of CPU. Thread ids are resolved to
+    Python thread names while the threads are alive.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._thread = None
+
+    def start(self):
+        self.stop_event = threading.Event()
+        self.queue = None
+        self.occupancy = []
+        self.rss_peak = 0
+        self.started = time.perf_counter()
+        self.usage_self = resource.getrusage(resource.RUSAGE_SELF)
+        self.usage_children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        self.cpu_start = thread_cpu_times()
+        self.cpu = {}
+        self.names = {}
+        self._sample()
+        self._thread = threading.Thread(target=self._run, name="resource-sampler", daemon=True)
+        self._thread.start()
+
+    def watch(self, q):
+        """Also samples the fill level of a pipeline queue."""
+        self.queue = q
+
+    def _sample(self):
+        for t in threading.enumerate():
+            if t.native_id is not None:
+                self.names[t.native_id] = t.name
+        self.cpu.update(thread_cpu_times())
+        self.rss_peak = max(self.rss_peak, read_proc_status().get("VmRSS", 0))
+        if self.queue is not None and self.queue.maxsize:
+            self.occupancy.append(self.queue.qsize() / self.queue.maxsize)
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            self._sample()
+
+    def stop(self, q=None, duration=None, buffer_wait=0.0, worker_split=None):
+        """Stops sampling and returns the report; `q` adds the queue wait
+        times and a bottleneck verdict. `worker_split` is the (read_sec,
+        work_sec) of process engine workers, which decides the verdict."""
+        if self._thread is None:
+            return {}
+        self._sample()
+        self.stop_event.set()
+        self._thread.join()
+        self._thread = None
+        elapsed = time.perf_counter() - self.started
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        user = usage.ru_utime - self.usage_self.ru_utime
+        system = usage.ru_stime - self.usage_self.ru_stime
+        child = (children.ru_utime - self.usage_children.ru_utime) + (children.ru_stime - self.usage_children.ru_stime)
+        threads = sorted((
+            {"thread": self.names.get(tid, str(tid)), "cpu_sec": round(cpu - self.cpu_start.get(tid, 0.0), 3)}
+            for tid, cpu in self.cpu.items()
+        ), key=lambda t: t["cpu_sec"], reverse=True)
+        report = {
+            "wall_sec": elapsed,
+            "cpu_user_sec": user,
+            "cpu_system_sec": system,
+            "cpu_children_sec": child, # worker processes of the process engine
+            "cores_busy": (user + system + child) / elapsed if elapsed else 0.0,
+            "cpu_count": os.cpu_count(),
+            "rss_peak_kb": self.rss_peak,
+            "rss_hwm_kb": read_proc_status().get("VmHWM"), # process lifetime, not just this run
+            "context_switches": {
+                "voluntary": usage.ru_nvcsw - self.usage_self.ru_nvcsw,
+                "involuntary": usage.ru_nivcsw - self.usage_self.ru_nivcsw,
+            },
+            "threads": [t for t in threads if t["cpu_sec"] > 0][:32],
+        }
+        if q is not None:
+            duration = duration or elapsed
+            if worker_split is not None:
+                verdict, reason = worker_verdict(*worker_split)
+            else:
+                verdict, reason = bottleneck_verdict(q.put_wait + buffer_wait, q.get_wait, len(q.putters), duration)
+            report["queue"] = {
+                "producers": len(q.putters),
+                "put_wait_sec": q.put_wait,
+                "buffer_wait_sec": buffer_wait,
+                "get_wait_sec": q.get_wait,
+                "mean_occupancy": (sum(self.occupancy) / len(self.occupancy)) if self.occupancy else None,
+            }
+            report["verdict"] = verdict
+            report["verdict_reason"] = reason
+        self.queue = None
+        return report
+
+RESOURCES = ResourceSampler(RESOURCE_SAMPLE_SEC)
+
+# --- Consumer Work & Worker Processes ---
+def chunk_work(kind, data):
+    """Simulated per-chunk CPU work (the kind a real loader does after reading)."""
+    if kind == "none":
+        return None
+    if kind == "crc32":
+        return zlib.crc32(data)
+    if kind == "sha256":
+        return hashlib.sha256(data).hexdigest()
+    raise ValueError(f"Unknown consumer work: {kind}")
+
+def process_reader(tasks, free_slots, results, buf, slot_size, work):
+    """Worker process body: reads ranges into shared memory slots.
+
+    Only descriptors travel back over `results`:
+    ("chunk", pid, slot, path, offset, length, read_sec, work_sec), then
+    ("done", pid, busy_sec, tasks). Runs in a forked child, so it must not
+    log (the parent's logging locks may be held).
+    """
+    busy = 0.0
+    done_tasks = 0
+    try:
+        while True:
+            task = tasks.get()
+            if task is None: break
+            task_start = time.perf_counter()
+            fp, start, end = task
+            fd = os.open(fp, os.O_RDONLY)
+            try:
+                offset = start
+                while offset < end:
+                    slot = free_slots.get()
+                    if slot is None:
+                        return # parent is shutting down
+                    base = slot * slot_size
+                    view = buf[base:base + min(slot_size, end - offset)]
+                    t0 = time.perf_counter()
+                    n = pread_into(fd, view, offset)
+                    t1 = time.perf_counter()
+                    chunk_work(work, view[:n])
+                    t2 = time.perf_counter()
+                    view.release()
+                    if not n:
+                        free_slots.put(slot)
+                        break
+                    results.put(("chunk", os.getpid(), slot, fp, offset, n, t1 - t0, t2 - t1))
+                    offset += n
+            finally:
+                os.close(fd)
+                busy += time.perf_counter() - task_start
+                done_tasks += 1
+    except Exception as e:
+        results.put(("error", os.getpid(), str(e)))
+    finally:
+        results.put(("done", os.getpid(), busy, done_tasks))
+
+def release_shared_memory(shm):
+    try:
+        shm.close()
+    except BufferError:
+        pass # a traceback still references a chunk view; unmapped on GC
+    shm.unlink()
+
+# --- GCS JSON API ---
+
+class GcsReader:
+    """Ranged object reads over the GCS JSON API, bypassing the FUSE mount.
+
+    One requests session with a connection pool sized to the reader
+    threads, so every ranged GET can reuse a kept-alive connection.
+    Against an emulator (GCS_ENDPOINT / STORAGE_EMULATOR_HOST) requests go
+    out unauthenticated; otherwise they carry default credentials.
+    """
+
+    DEFAULT_ENDPOINT = "https://storage.googleapis.com"
+
+    def __init__(self, bucket, pool_size, endpoint="", keepalive=True):
+        # Lazy: only the gcs engine needs the HTTP and auth stacks
+        import requests
+        from urllib.parse import quote
+        self._quote = quote
+        endpoint = endpoint or os.environ.get("STORAGE_EMULATOR_HOST", "")
+        if endpoint and "://" not in endpoint:
+            endpoint = "http://" + endpoint
+        self.endpoint = (endpoint or self.DEFAULT_ENDPOINT).rstrip("/")
+        self.bucket = bucket
+        self.keepalive = keepalive
+        if self.endpoint == self.DEFAULT_ENDPOINT:
+            import google.auth
+            from google.auth.transport.requests import AuthorizedSession
+            credentials, _ = google.auth.default(scopes=["https://www.googleapis.com/auth/devstorage.read_only"])
+            self.session = AuthorizedSession(credentials)
+        else:
+            self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connects = 0
+        self.first_byte_sec = []
+        # Count TCP/TLS connects, including reconnects after the server
+        # closed a pooled connection (urllib3's own counter misses those)
+        from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+        adapter.poolmanager.pool_classes_by_scheme = {
+            "http": self._counted(HTTPConnectionPool),
+            "https": self._counted(HTTPSConnectionPool),
+        }
+
+    def _counted(self, pool_cls):
+        reader = self
+
+        class CountedConnection(pool_cls.ConnectionCls):
+            def connect(self):
+                with reader._lock:
+                    reader.connects += 1
+                return super().connect()
+
+        return type(pool_cls.__name__, (pool_cls,), {"ConnectionCls": CountedConnection})
+
+    def _object_url(self, name):
+        return f"{self.endpoint}/storage/v1/b/{self.bucket}/o/{self._quote(name, safe='')}"
+
+    def list_objects(self, name):
+        """Returns [(name, size, crc32c)] for the object `name` or everything under `name/`."""
+        prefix = name.rstrip("/")
+        objects = []
+        params = {"prefix": prefix, "fields": "items(name,size,crc32c),nextPageToken"}
+        while True:
+            resp = self.session.get(f"{self.endpoint}/storage/v1/b/{self.bucket}/o", params=params)
+            resp.raise_for_status()
+            page = resp.json()
+            for item in page.get("items", []):
+                if item["name"] == prefix or item["name"].startswith(prefix + "/"):
+                    if item["name"].endswith("/"): continue # folder placeholder
+                    crc = parse_crc32c(item["crc32c"]) if item.get("crc32c") else None
+                    objects.append((item["name"], int(item["size"]), crc))
+            if not page.get("nextPageToken"): break
+            params["pageToken"] = page["nextPageToken"]
+        if not objects:
+            raise FileNotFoundError(f"No objects at gs://{self.bucket}/{prefix}")
+        return objects
+
+    def open_range(self, name, start, end):
+        """Issues a ranged GET for [start, end) and returns the raw response stream."""
+        headers = {"Range": f"bytes={start}-{end - 1}", "Accept-Encoding": "identity"}
+        if not self.keepalive:
+            headers["Connection"] = "close"
+        t0 = time.perf_counter()
+        resp = self.session.get(self._object_url(name), params={"alt": "media"}, headers=headers, stream=True)
+        resp.raise_for_status()
+        with self._lock:
+            self.requests += 1
+            self.first_byte_sec.append(time.perf_counter() - t0)
+        return resp
+
+    def close_range(self, resp):
+        """Returns a fully read connection to the pool; drops a partial one."""
+        if resp.raw.length_remaining == 0:
+            resp.raw.read() # lets urllib3 see the end of the body
+            resp.raw.release_conn()
+        else:
+            resp.close()
+
+    def report(self):
+        ttfb = sorted(self.first_byte_sec)
+        return {
+            "endpoint": self.endpoint,
+            "bucket": self.bucket,
+            "requests": self.requests,
+            "connections_opened": self.connects,
+            "connection_reuse": (1 - self.connects / self.requests) if self.requests else None,
+            "keepalive": self.keepalive,
+            "first_byte_ms": {
+                "mean": sum(ttfb) / len(ttfb) * 1000,
+                "p50": ttfb[len(ttfb) // 2] * 1000,
+                "max": ttfb[-1] * 1000,
+            } if ttfb else {},
+        }
+
+# --- Integrity Verification ---
+CRC32C_POLY = 0x82F63B78 # reflected Castagnoli polynomial
+CRC32_POLY = 0xEDB88320 # reflected IEEE polynomial (zlib.crc32)
+
+def _gf2_times(mat, vec):
+    total = 0
+    i = 0
+    while vec:
+        if vec & 1:
+            total ^= mat[i]
+        vec >>= 1
+        i += 1
+    return total
+
+def _gf2_square(mat):
+    return [_gf2_times(mat, mat[n]) for n in range(32)]
+
+def crc_combine(crc1, crc2, len2, poly):
+    """CRC of A + B from crc(A), crc(B) and len(B); zlib's crc32_combine for any reflected poly."""
+    if len2 <= 0:
+        return crc1
+    odd = [poly] + [1 << n for n in range(31)] # operator for one zero bit
+    even = _gf2_square(odd) # two zero bits
+    odd = _gf2_square(even) # four zero bits
+    while True:
+        even = _gf2_square(odd)
+        if len2 & 1:
+            crc1 = _gf2_times(even, crc1)
+        len2 >>= 1
+        if not len2: break
+        odd = _gf2_square(even)
+        if len2 & 1:
+            crc1 = _gf2_times(odd, crc1)
+        len2 >>= 1
+        if not len2: break
+    return crc1 ^ crc2
+
+def crc32c_value(data, piece=1 << 20):
+    """crc32c of any bytes-like object.
+
+    google_crc32c only accepts bytes, so buffer views are fed through
+    cache-sized copies rather than one copy of the whole chunk.
+    """
+    if isinstance(data, bytes):
+        return google_crc32c.value(data)
+    view = memoryview(data)
+    crc = 0
+    for i in range(0, len(view), piece):
+        crc = google_crc32c.extend(crc, bytes(view[i:i + piece]))
+    return crc
+
+def crc32c_to_gcs(value):
+    """Formats a crc32c the way GCS object metadata does (base64, big-endian)."""
+    return base64.b64encode(value.to_bytes(4, "big")).decode()
+
+def parse_crc32c(value):
+    return int(value) if isinstance(value, int) else int.from_bytes(base64.b64decode(value), "big")
+
+def load_expected_crc32c(target_files):
+    """Expected per-file crc32c from VERIFY_MANIFEST and/or VERIFY_BUCKET metadata."""
+    expected = {}
+    if VERIFY_MANIFEST:
+        with open(VERIFY_MANIFEST) as f:
+            manifest = json.load(f)
+        for fp in target_files:
+            rel = os.path.relpath(fp, MOUNT_PATH)
+            if rel in manifest:
+                expected[fp] = parse_crc32c(manifest[rel])
+    if VERIFY_BUCKET:
+        from google.cloud import storage # lazy: only needed for metadata lookups
+        bucket = storage.Client().bucket(VERIFY_BUCKET)
+        for fp in target_files:
+            if fp in expected: continue
+            blob = bucket.get_blob(os.path.relpath(fp, MOUNT_PATH))
+            if blob is not None and blob.crc32c:
+                expected[fp] = parse_crc32c(blob.crc32c)
+    return expected
+
+class ChunkVerifier:
+    """Hashes chunks on a thread pool while the consumer moves on.
+
+    Each chunk gets a crc32c (comparable with GCS object metadata) and a
+    zlib crc32 as the fast hash; both release the GIL on large buffers.
+    A chunk's buffer is only returned to its pool once it is hashed.
+    Per-file values are combined from per-chunk CRCs in offset order.
+    """
+
+    def __init__(self, threads):
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=threads, thread_name_prefix="verify")
+        self._inflight = threading.BoundedSemaphore(threads * 2)
+        self._lock = threading.Lock()
+        self.chunks = {} # path -> [(offset, length, crc32c, crc32)]
+        self.errors = []
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def submit(self, item, length):
+        self._inflight.acquire()
+        self._pool.submit(self._hash, item, length)
+
+    def _hash(self, item, length):
+        try:
+            t0 = time.perf_counter()
+            c = crc32c_value(item.data) if HAS_CRC32C else None
+            f = zlib.crc32(item.data)
+            elapsed = time.perf_counter() - t0
+            with self._lock:
+                self.chunks.setdefault(item.path, []).append((item.offset, length, c, f))
+                self.bytes += length
+                self.seconds += elapsed
+        except Exception as e:
+            with self._lock:
+                self.errors.append(str(e))
+                del self.errors[5:] # the first few are enough to diagnose
+        finally:
+            item.done()
+            self._inflight.release()
+
+    def finish(self):
+        self._pool.shutdown(wait=True)
+
+    def report(self, expected, file_sizes=None):
+        """Per-file results for every hashed or expected file.
+
+        A file with an expected checksum whose chunks do not cover
+        [0, size) (a gap, or no chunks at all) counts as mismatched.
+        """
+        files = []
+        verified = mismatched = 0
+        file_sizes = file_sizes or {}
+        for path in sorted(set(self.chunks) | set(expected), key=str):
+            parts = sorted(self.chunks.get(path, []))
+            contiguous = all(parts[i][0] + parts[i][1] == parts[i + 1][0] for i in range(len(parts) - 1))
+            covered = sum(p[1] for p in parts)
+            complete = bool(parts) and contiguous and parts[0][0] == 0 and covered >= file_sizes.get(path, covered)
+            crc32c = crc32 = None
+            if not parts and file_sizes.get(path) == 0:
+                complete = True # empty file: nothing to hash, both CRCs are 0
+                crc32c, crc32 = (0 if HAS_CRC32C else None), 0
+            elif complete:
+                crc32c, crc32 = parts[0][2], parts[0][3]
+                for _, length, c, f in parts[1:]:
+                    if HAS_CRC32C:
+                        crc32c = crc_combine(crc32c, c, length, CRC32C_POLY)
+                    crc32 = crc_combine(crc32, f, length, CRC32_POLY)
+            want = expected.get(path)
+            match = None
+            if want is not None and not complete:
+                match = False # holes can't be verified; the file did not arrive whole
+                mismatched += 1
+            elif want is not None and crc32c is not None:
+                match = crc32c == want
+                verified += match
+                mismatched += not match
+            files.append({
+                "path": path or "<synthetic>",
+                "bytes": covered,
+                "complete": complete,
+                "crc32c": crc32c_to_gcs(crc32c) if crc32c is not None else None,
+                "crc32": f"{crc32:08x}" if crc32 is not None else None,
+                "expected_crc32c": crc32c_to_gcs(want) if want is not None else None,
+                "match": match,
+                "chunks": [
+                    {"offset": o, "length": n,
+                     "crc32c": crc32c_to_gcs(c) if c is not None else None,
+                     "crc32": f"{f:08x}"}
+                    for o, n, c, f in parts
+                ],
+            })
+        if self.errors or mismatched:
+            status = "failed"
+        elif verified and verified == len(files):
+            status = "verified"
+        else:
+            status = "unverified" # checksums computed, nothing to compare against
+        return {
+            "status": status,
+            "crc32c_available": HAS_CRC32C,
+            "files_verified": verified,
+            "files_mismatched": mismatched,
+            "chunks_hashed": sum(len(p) for p in self.chunks.values()),
+            "hash_cpu_seconds": self.seconds,
+            # Per-thread hashing speed; compare with the run's throughput_mb_s
+            "hash_mb_s_per_thread": (self.bytes / 1024**2 / self.seconds) if self.seconds else 0,
+            "errors": self.errors,
+            "files": files,
+        }
+
+def allocation_report(chunks, total_bytes, pool=None, zero_copy=False):
+    """Compares chunk buffer allocations against one-allocation-per-chunk.
+
+    `pool` is (buffer count, buffer size) for engines that recycle buffers.
+    """
+    if zero_copy:
+        return {
+            "mode": "zero_copy",
+            "buffers_allocated": 0,
+            "bytes_allocated": 0,
+            "allocations_avoided": chunks,
+            "bytes_allocation_avoided": total_bytes,
+        }
+    if pool is None:
+        return {
+            "mode": "per_chunk",
+            "buffers_allocated": chunks,
+            "bytes_allocated": total_bytes,
+            "allocations_avoided": 0,
+            "bytes_allocation_avoided": 0,
+        }
+    count, size = pool
+    pooled_bytes = count * size
+    return {
+        "mode": "pooled",
+        "buffers_allocated": count,
+        "bytes_allocated": pooled_bytes,
+        "allocations_avoided": max(0, chunks - count),
+        "bytes_allocation_avoided": max(0, total_bytes - pooled_bytes),
+    }
+
+def dataset_files():
+    """Lists the files under MOUNT_PATH/MODEL_FILE."""
+    full_path = os.path.join(MOUNT_PATH, MODEL_FILE)
+    if os.path.isdir(full_path):
+        return [os.path.join(root, f) for root, _, files in os.walk(full_path) for f in files]
+    if os.path.isfile(full_path):
+        return [full_path]
+    raise FileNotFoundError(f"Source not found: {full_path}")
+
+# --- Benchmark Modes ---
+# BENCHMARK_MODE=stream is the chunk pipeline in perform_benchmark(); other
+# modes are self-contained runners that start the clock themselves and
+# return a details dict with at least total_bytes and duration_sec.
+
+def parse_safetensors_header(path):
+    """Returns (tensors, data_start) where tensors are (name, dtype, shape, start, length)
+    with start relative to the data section that begins at byte data_start."""
+    with open(path, "rb") as f:
+        (header_len,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_len))
+    header.pop("__metadata__", None)
+    tensors = []
+    for name, info in header.items():
+        start, end = info["data_offsets"]
+        tensors.append((name, info["dtype"], info["shape"], start, end - start))
+    return tensors, 8 + header_len
+
+def allocate_host_buffer(size):
+    """Contiguous host buffer for the whole model. numpy.empty skips the
+    memset a bytearray would do, so pages are faulted in by the reads."""
+    if load_numpy() is not None:
+        return memoryview(np.empty(size, dtype=np.uint8)), "numpy"
+    return memoryview(bytearray(size)), "bytearray"
+
+def run_safetensors_load():
+    """Loads every .safetensors shard tensor-by-tensor into one host buffer.
+
+    Tensors are scheduled largest first across NUM_THREADS workers; ones
+    bigger than a chunk are split so a single huge embedding does not
+    serialize the tail. Each tensor lands at its final offset (shard base
+    + data offset), so the buffer is the loaded model.
+    """
+    files = [fp for fp in dataset_files() if fp.endswith(".safetensors")]
+    if not files:
+        raise FileNotFoundError(f"No .safetensors files under {os.path.join(MOUNT_PATH, MODEL_FILE)}")
+    chunk_size = CHUNK_SIZE_MB * 1024 * 1024
+    load_numpy() # keep the one-time import out of the measured load
+
+    start = time.time()
+    STATE["metrics"]["start_time"] = start
+    READ_STATS.reset(start)
+    t0 = time.perf_counter()
+
+    shards = []
+    base = 0
+    for fp in sorted(files):
+        tensors, data_start = parse_safetensors_header(fp)
+        data_size = max((s + n for _, _, _, s, n in tensors), default=0)
+        shards.append((fp, tensors, data_start, base))
+        base += data_size
+    header_sec = time.perf_counter() - t0
+    host, buffer_kind = allocate_host_buffer(base)
+
+    # (tensor id, dest offset, file offset, length) pieces, largest tensors first
+    pieces = []
+    sizes = []
+    fds = {}
+    for fp, tensors, data_start, shard_base in shards:
+        fds[fp] = os.open(fp, os.O_RDONLY)
+        for name, _, _, rel, length in tensors:
+            tid = len(sizes)
+            sizes.append((length, name))
+            for off in range(0, max(length, 1), chunk_size):
+                pieces.append((tid, fp, shard_base + rel + off, data_start + rel + off, min(chunk_size, length - off)))
+    pieces.sort(key=lambda p: (-sizes[p[0]][0], p[0], p[2]))
+
+    remaining = [0] * len(sizes)
+    for p in pieces:
+        remaining[p[0]] += 1
+    done_at = [None] * len(sizes)
+    lock = threading.Lock()
+    loaded = [0]
+
+    def load_piece(piece):
+        tid, fp, dest, src, length = piece
+        p0 = time.perf_counter()
+        n = pread_into(fds[fp], host[dest:dest + length], src) if length else 0
+        READ_STATS.record(n, time.perf_counter() - p0)
+        if n != length:
+            raise IOError(f"Short read in {fp} at {src}: {n} of {length} bytes")
+        with lock:
+            loaded[0] += n
+            STATE["metrics"]["total_bytes"] = loaded[0]
+            remaining[tid] -= 1
+            if not remaining[tid]:
+                done_at[tid] = time.perf_counter() - t0
+
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=NUM_THREADS) as executor:
+            for f in [executor.submit(load_piece, p) for p in pieces]:
+                f.result()
+    finally:
+        for fd in fds.values():
+            os.close(fd)
+
+    total_sec = time.perf_counter() - t0
+    finished = [t for t in done_at if t is not None]
+    largest = max(sizes, default=(0, None))
+    return {
+        "shards": len(shards),
+        "tensors": len(sizes),
+        "total_bytes": loaded[0],
+        "duration_sec": total_sec,
+        "header_parse_sec": header_sec,
+        "time_to_first_tensor_sec": min(finished, default=None),
+        "time_to_all_tensors_sec": max(finished, default=None),
+        "effective_gb_s": (loaded[0] / 1024**3 / total_sec) if total_sec else 0,
+        "largest_tensor": {"name": largest[1], "mb": largest[0] / 1024**2},
+        "host_buffer": buffer_kind,
+    }
+
+def read_proc_status():
+    """Memory fields (kB) from /proc/self/status, or {} off Linux."""
+    fields = {}
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("VmRSS", "VmHWM", "RssAnon", "RssFile", "RssShmem"):
+                    fields[key] = int(value.split()[0])
+    except OSError:
+        pass
+    return fields
+
+def load_access_order():
+    if isinstance(ACCESS_ORDER, list):
+        return ACCESS_ORDER
+    if ACCESS_ORDER:
+        with open(ACCESS_ORDER) as f:
+            return json.load(f)
+    return None
+
+def run_lazy_mmap():
+    """Time-to-useful for a server that lazily mmaps safetensors shards.
+
+    Maps every shard, then replays an access order (ACCESS_ORDER, or header
+    order) touching one byte per page of each tensor, like a first forward
+    pass would. Reports latency to the first tensor and to 50% / 100% of
+    the replayed bytes, and the RSS that results.
+    """
+    files = [fp for fp in dataset_files() if fp.endswith(".safetensors")]
+    if not files:
+        raise FileNotFoundError(f"No .safetensors files under {os.path.join(MOUNT_PATH, MODEL_FILE)}")
+    order = load_access_order()
+    rss_before = read_proc_status()
+
+    start = time.time()
+    STATE["metrics"]["start_time"] = start
+    READ_STATS.reset(start)
+    t0 = time.perf_counter()
+
+    maps = []
+    index = {} # tensor name -> (mmap, absolute start, length)
+    header_order = []
+    checkpoint_bytes = 0
+    try:
+        for fp in sorted(files):
+            tensors, data_start = parse_safetensors_header(fp)
+            with open(fp, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            maps.append(mm)
+            for name, _, _, rel, length in sorted(tensors, key=lambda t: t[3]):
+                index[name] = (mm, data_start + rel, length)
+                header_order.append(name)
+                checkpoint_bytes += length
+        map_sec = time.perf_counter() - t0
+
+        names = order if order is not None else header_order
+        missing = [n for n in names if n not in index]
+        replay = [index[n] for n in names if n in index]
+        target = sum(length for _, _, length in replay)
+        milestones = {"first_tensor_sec": None, "half_bytes_sec": None, "all_bytes_sec": None}
+        touched = 0
+        for mm, pos, length in replay:
+            p0 = time.perf_counter()
+            if length:
+                mm[pos:pos + length:mmap.PAGESIZE] # one byte per page faults the tensor in
+            now = time.perf_counter()
+            READ_STATS.record(length, now - p0)
+            touched += length
+            STATE["metrics"]["total_bytes"] = touched
+            if milestones["first_tensor_sec"] is None:
+                milestones["first_tensor_sec"] = now - t0
+            if milestones["half_bytes_sec"] is None and touched * 2 >= target:
+                milestones["half_bytes_sec"] = now - t0
+        milestones["all_bytes_sec"] = time.perf_counter() - t0
+        rss_after = read_proc_status()
+    finally:
+        for mm in maps:
+            mm.close()
+
+    return {
+        "shards": len(maps),
+        "tensors_replayed": len(replay),
+        "tensors_missing": missing[:20],
+        "access_order": "custom" if order is not None else "header",
+        "total_bytes": touched,
+        "duration_sec": milestones["all_bytes_sec"],
+        "checkpoint_bytes": checkpoint_bytes,
+        "fraction_touched": (touched / checkpoint_bytes) if checkpoint_bytes else 0,
+        "map_sec": map_sec,
+        "milestones": milestones,
+        "rss_kb_before": rss_before,
+        "rss_kb_after": rss_after,
+    }
+
+def pwrite_all(fd, view, offset):
+    """Writes all of `view` to `fd` at `offset`, retrying short writes."""
+    n = 0
+    while n < len(view):
+        n += os.pwritev(fd, [view[n:]], offset + n)
+    return n
+
+def run_write_checkpoint():
+    """Writes a synthetic checkpoint the way a training job saves one.
+
+    WRITE_SIZE_GB is split over WRITE_FILES shards under WRITE_PATH.
+    `sequential` appends each shard from one thread; `parallel` has
+    NUM_THREADS workers pwrite byte ranges of the same shard. WRITE_FSYNC
+    picks when data is forced out (never, once per shard, every chunk).
+    A shard's commit covers everything after its last byte is written:
+    final fsync, close (where GCS FUSE uploads), and with WRITE_ATOMIC the
+    rename from `.tmp` plus a directory fsync. Per-chunk write latency
+    lands in read_stats.
+    """
+    if WRITE_LAYOUT not in ("sequential", "parallel"):
+        raise ValueError(f"Unknown write layout: {WRITE_LAYOUT}")
+    if WRITE_FSYNC not in ("none", "file", "chunk"):
+        raise ValueError(f"Unknown fsync policy: {WRITE_FSYNC}")
+    out_dir = WRITE_PATH or os.path.join(MOUNT_PATH, "benchmark-writes")
+    os.makedirs(out_dir, exist_ok=True)
+    chunk_size = CHUNK_SIZE_MB * 1024 * 1024
+    total = int(WRITE_SIZE_GB * 1024**3)
+    files = max(1, WRITE_FILES)
+    shard_sizes = [total // files + (i < total % files) for i in range(files)]
+    if SYNTHETIC_CONTENT == "random":
+        block = os.urandom(chunk_size) # one fill; per-chunk urandom would dominate the timing
+    elif SYNTHETIC_CONTENT == "zeros":
+        block = bytes(chunk_size)
+    else:
+        raise ValueError(f"Unknown buffer content: {SYNTHETIC_CONTENT}")
+    source = memoryview(block) # read-only: shared by all writers
+    stop_event = threading.Event()
+    progress_lock = threading.Lock()
+    workers = NUM_THREADS if WRITE_LAYOUT == "parallel" else 1
+
+    start = time.time()
+    STATE["metrics"]["start_time"] = start
+    READ_STATS.reset(start)
+    t0 = time.perf_counter()
+
+    def write_range(fd, begin, end):
+        offset = begin
+        while offset < end and not stop_event.is_set():
+            n = min(chunk_size, end - offset)
+            c0 = time.perf_counter()
+            pwrite_all(fd, source[:n], offset)
+            if WRITE_FSYNC == "chunk":
+                os.fsync(fd)
+            READ_STATS.record(n, time.perf_counter() - c0)
+            offset += n
+            with progress_lock:
+                STATE["metrics"]["total_bytes"] += n
+
+    written = []
+    commits = []
+    fsync_sec = 0.0
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            for i, size in enumerate(shard_sizes):
+                final = os.path.join(out_dir, f"checkpoint-{i:05d}-of-{files:05d}.bin")
+                path = final + ".tmp" if WRITE_ATOMIC else final
+                written.append(path)
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+                try:
+                    ranges = plan_ranges([path], {path: size}, 0, chunk_size, workers)
+                    futures = [executor.submit(write_range, fd, begin, end) for _, begin, end in ranges]
+                    for f in concurrent.futures.as_completed(futures):
+                        if f.exception() is not None:
+                            stop_event.set() # the other writers stop at their next chunk
+                    errors = [f.exception() for f in futures if f.exception() is not None]
+                    if errors:
+                        raise errors[0]
+                    c0 = time.perf_counter()
+                    if WRITE_FSYNC != "none":
+                        os.fsync(fd)
+                        fsync_sec += time.perf_counter() - c0
+                finally:
+                    os.close(fd)
+                if WRITE_ATOMIC:
+                    os.rename(path, final)
+                    written[-1] = final
+                    if WRITE_FSYNC != "none":
+                        # The rename is only durable once the directory is synced
+                        dfd = os.open(out_dir, os.O_RDONLY)
+                        try:
+                            os.fsync(dfd)
+                        finally:
+                            os.close(dfd)
+                commits.append(time.perf_counter() - c0)
+        duration = time.perf_counter() - t0
+    finally:
+        if not WRITE_KEEP:
+            for path in written:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+    ordered = sorted(commits)
+    return {
+        "path": out_dir,
+        "files": files,
+        "layout": WRITE_LAYOUT,
+        "writers": workers,
+        "fsync": WRITE_FSYNC,
+        "atomic": WRITE_ATOMIC,
+        "total_bytes": sum(shard_sizes),
+        "duration_sec": duration,
+        "fsync_sec": fsync_sec,
+        "commit_latency_ms": {
+            "mean": sum(ordered) / len(ordered) * 1000,
+            "p50": ordered[len(ordered) // 2] * 1000,
+            "max": ordered[-1] * 1000,
+            "total": sum(ordered) * 1000,
+        },
+        "kept": WRITE_KEEP,
+    }
+
+class BlockSampler:
+    """Picks block indexes in [0, blocks) uniformly or with Zipf-like skew.
+
+    Zipf ranks come from the inverse CDF of a bounded power law, so no
+    per-block table is needed for multi-GB datasets. Ranks are scattered
+    with a multiplicative bijection so the hot set is spread over the
+    dataset instead of sitting at the start of the first file.
+    """
+    SCATTER = 2654435761 # prime
+
+    def __init__(self, blocks, dist="uniform", s=1.1, seed=None):
+        if dist not in ("uniform", "zipf"):
+            raise ValueError(f"Unknown offset distribution: {dist}")
+        self.blocks = blocks
+        self.dist = dist
+        self.s = s
+        self.rng = random.Random(seed)
+        self.scatter = self.SCATTER if math.gcd(self.SCATTER, blocks) == 1 else 1
+
+    def next(self):
+        if self.dist == "uniform":
+            return self.rng.randrange(self.blocks)
+        u = self.rng.random()
+        if abs(self.s - 1.0) < 1e-9:
+            rank = self.blocks ** u
+        else:
+            rank = ((self.blocks ** (1 - self.s) - 1) * u + 1) ** (1 / (1 - self.s))
+        rank = min(self.blocks, max(1, int(rank))) - 1
+        return (rank * self.scatter) % self.blocks
+
+def run_random_read():
+    """Small random preads across the dataset for a fixed duration.
+
+    NUM_THREADS workers each keep one RANDOM_IO_KB pread in flight at
+    block-aligned offsets drawn from RANDOM_DIST over every file under
+    MODEL_FILE. Reports IOPS and the per-op latency distribution. Page
+    cache residency before and after shows whether the hot set was
+    served from memory rather than the mount.
+    """
+    io_size = RANDOM_IO_KB * 1024
+    if not 4 * 1024 <= io_size <= 1024 * 1024:
+        raise ValueError(f"RANDOM_IO_KB must be 4 - 1024, got {RANDOM_IO_KB}")
+    files = [fp for fp in dataset_files() if os.path.getsize(fp) >= io_size]
+    if not files:
+        raise FileNotFoundError(f"No files of at least {RANDOM_IO_KB} KB under {os.path.join(MOUNT_PATH, MODEL_FILE)}")
+    file_sizes = {fp: os.path.getsize(fp) for fp in files}
+    # Global block index -> (file, offset) through cumulative block counts
+    bounds = []
+    blocks = 0
+    for fp in files:
+        blocks += file_sizes[fp] // io_size
+        bounds.append(blocks)
+    resident_before = probe_residency(file_sizes)
+
+    fds = [os.open(fp, os.O_RDONLY) for fp in files]
+    histograms = [LatencyHistogram() for _ in range(NUM_THREADS)]
+    stop_event = threading.Event()
+
+    def worker(w):
+        sampler = BlockSampler(blocks, RANDOM_DIST, ZIPF_S, seed=w)
+        view = memoryview(bytearray(io_size))
+        hist = histograms[w]
+        while not stop_event.is_set():
+            block = sampler.next()
+            i = bisect.bisect_right(bounds, block)
+            offset = (block - (bounds[i - 1] if i else 0)) * io_size
+            t0 = time.perf_counter()
+            n = pread_into(fds[i], view, offset)
+            elapsed = time.perf_counter() - t0
+            hist.record(elapsed)
+            READ_STATS.record(n, elapsed)
+
+    start = time.time()
+    STATE["metrics"]["start_time"] = start
+    READ_STATS.reset(start)
+    t0 = time.perf_counter()
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=NUM_THREADS) as executor:
+            futures = [executor.submit(worker, w) for w in range(NUM_THREADS)]
+            concurrent.futures.wait(futures, timeout=RANDOM_DURATION_SEC,
+                                    return_when=concurrent.futures.FIRST_EXCEPTION)
+            stop_event.set()
+            for f in futures:
+                f.result() # re-raise the first worker error
+        duration = time.perf_counter() - t0
+    finally:
+        stop_event.set()
+        for fd in fds:
+            os.close(fd)
+
+    latency = LatencyHistogram()
+    for hist in histograms:
+        latency.merge(hist)
+    return {
+        "files": len(files),
+        "dataset_bytes": sum(file_sizes.values()),
+        "io_kb": RANDOM_IO_KB,
+        "distribution": RANDOM_DIST,
+        "zipf_s": ZIPF_S if RANDOM_DIST == "zipf" else None,
+        "concurrency": NUM_THREADS,
+        "ops": latency.count,
+        "iops": latency.count / duration if duration else 0,
+        "total_bytes": latency.count * io_size,
+        "duration_sec": duration,
+        "latency_ms": latency.summary_ms(),
+        "cache": {
+            "resident_fraction_before": resident_before,
+            "resident_fraction_after": probe_residency(file_sizes),
+            "label": cache_label(resident_before),
+        },
+    }
+
+def run_metadata():
+    """Listing, stat and open+first-byte latency over a many-small-files tree.
+
+    Three timed phases with NUM_THREADS concurrent operations each:
+    a parallel directory walk (scandir per directory), an explicit
+    os.stat per file, and open + 1-byte read + close per file. Workers
+    return their latencies and the caller records them, so histograms
+    need no locking. METADATA_MAX_FILES caps the stat/open phases.
+    """
+    root = os.path.join(MOUNT_PATH, MODEL_FILE)
+    if not os.path.isdir(root):
+        raise FileNotFoundError(f"Metadata mode needs a directory: {root}")
+
+    def list_dir(path):
+        t0 = time.perf_counter()
+        subdirs, files = [], []
+        with os.scandir(path) as it:
+            for entry in it:
+                (subdirs if entry.is_dir(follow_symlinks=False) else files).append(entry.path)
+        return time.perf_counter() - t0, subdirs, files
+
+    def stat_batch(paths):
+        times = []
+        for path in paths:
+            t0 = time.perf_counter()
+            os.stat(path)
+            times.append(time.perf_counter() - t0)
+        return times
+
+    def open_batch(paths):
+        times = []
+        for path in paths:
+            t0 = time.perf_counter()
+            with open(path, "rb", buffering=0) as f:
+                f.read(1)
+            times.append(time.perf_counter() - t0)
+        return times
+
+    def run_batches(executor, fn, paths, hist):
+        t0 = time.perf_counter()
+        batch = max(1, min(256, len(paths) // (NUM_THREADS * 4)))
+        for times in executor.map(fn, [paths[i:i + batch] for i in range(0, len(paths), batch)]):
+            for t in times:
+                hist.record(t)
+        return time.perf_counter() - t0
+
+    start = time.time()
+    STATE["metrics"]["start_time"] = start
+    READ_STATS.reset(start)
+    t0 = time.perf_counter()
+    list_hist, stat_hist, open_hist = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    files = []
+    dirs = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=NUM_THREADS) as executor:
+        pending = {executor.submit(list_dir, root)}
+        while pending:
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for f in done:
+                seconds, subdirs, found = f.result()
+                list_hist.record(seconds)
+                dirs += 1
+                files.extend(found)
+                pending.update(executor.submit(list_dir, d) for d in subdirs)
+        enumerate_sec = time.perf_counter() - t0
+
+        sample = files[:METADATA_MAX_FILES] if METADATA_MAX_FILES else files
+        stat_sec = run_batches(executor, stat_batch, sample, stat_hist)
+        open_sec = run_batches(executor, open_batch, sample, open_hist)
+    duration = time.perf_counter() - t0
+    STATE["metrics"]["files_processed"] = len(sample)
+
+    def rate(n, seconds):
+        return n / seconds if seconds else 0.0
+
+    return {
+        "root": root,
+        "concurrency": NUM_THREADS,
+        "directories": dirs,
+        "files": len(files),
+        "files_sampled": len(sample),
+        "enumerate_sec": enumerate_sec,
+        "listing": {"dirs_per_sec": rate(dirs, enumerate_sec), "entries_per_sec": rate(len(files) + dirs, enumerate_sec),
+                    "latency_ms": list_hist.summary_ms()},
+        "stat": {"seconds": stat_sec, "per_sec": rate(len(sample), stat_sec), "latency_ms": stat_hist.summary_ms()},
+        "open_first_byte": {"seconds": open_sec, "per_sec": rate(len(sample), open_sec),
+                            "latency_ms": open_hist.summary_ms()},
+        "total_bytes": 0, # metadata only; one byte per opened file is not throughput
+        "duration_sec": duration,
+    }
+
+class RangeCursor:
+    """Hands out the dataset as consecutive reads of the caller's size,
+    wrapping around at the end so a run can outlast the data."""
+
+    def __init__(self, files, file_sizes):
+        self.files = [(fp, file_sizes[fp]) for fp in files if file_sizes[fp]]
+        if not self.files:
+            raise ValueError("Nothing to read: every file is empty")
+        self._fds = {fp: os.open(fp, os.O_RDONLY) for fp, _ in self.files}
+        self._lock = threading.Lock()
+        self._index = 0
+        self._offset = 0
+        self.wraps = 0
+
+    def next(self, size):
+        """Returns (fd, offset, length) of the next read."""
+        with self._lock:
+            fp, file_size = self.files[self._index]
+            offset = self._offset
+            length = min(size, file_size - offset)
+            self._offset += length
+            if self._offset >= file_size:
+                self._index, self._offset = self._index + 1, 0
+                if self._index == len(self.files):
+                    self._index = 0
+                    self.wraps += 1
+            return self._fds[fp], offset, length
+
+    def close(self):
+        for fd in self._fds.values():
+            os.close(fd)
+
+def run_autotune():
+    """Hill-climbs NUM_THREADS and CHUNK_SIZE_MB during one continuous read.
+
+    Starts at one thread and AUTOTUNE_START_CHUNK_MB, then walks one axis
+    at a time (threads, then chunk size, repeated): doubles while each step
+    adds at least AUTOTUNE_MIN_GAIN throughput over a AUTOTUNE_WINDOW_SEC
+    window, tries halving if the first doubling did not help, and stops
+    when a whole pass changes nothing. A step whose p99 read latency per MB
+    grows more than AUTOTUNE_MAX_LATENCY_GROWTH x is rejected even if it is
+    faster. threads x chunk never exceeds the memory budget. Reads are
+    ranged preads dropped from the page cache afterwards, so wrapping
+    around a small dataset keeps measuring the mount.
+    """
+    files = dataset_files()
+    cursor = RangeCursor(files, {fp: os.path.getsize(fp) for fp in files})
+    budget_bytes, budget_source = memory_budget()
+
+    lock = threading.Lock()
+    cond = threading.Condition(lock)
+    setting = {"threads": 1, "chunk_mb": max(1, AUTOTUNE_START_CHUNK_MB)}
+    window = {"bytes": 0, "latency": LatencyHistogram()}
+    totals = {"bytes": 0}
+    stop_event = threading.Event()
+    workers = []
+    errors = []
+
+    def reader(idx):
+        buf = None
+        try:
+            while not stop_event.is_set():
+                with cond:
+                    while idx >= setting["threads"] and not stop_event.is_set():
+                        cond.wait(0.5) # parked: concurrency was lowered
+                    size = setting["chunk_mb"] * 1024 * 1024
+                if stop_event.is_set(): break
+                if buf is None or len(buf) != size:
+                    buf = memoryview(bytearray(size))
+                fd, offset, length = cursor.next(size)
+                t0 = time.perf_counter()
+                n = pread_into(fd, buf[:length], offset)
+                elapsed = time.perf_counter() - t0
+                drop_cache(fd, offset, length)
+                READ_STATS.record(n, elapsed)
+                with lock:
+                    window["bytes"] += n
+                    window["latency"].record(elapsed)
+                    totals["bytes"] += n
+                    STATE["metrics"]["total_bytes"] = totals["bytes"]
+        except Exception as e:
+            errors.append(str(e))
+            stop_event.set()
+
+    def apply(threads, chunk_mb):
+        with cond:
+            setting["threads"], setting["chunk_mb"] = threads, chunk_mb
+            cond.notify_all()
+        while len(workers) < threads:
+            t = threading.Thread(target=reader, args=(len(workers),), name=f"reader_{len(workers)}", daemon=True)
+            workers.append(t)
+            t.start()
+
+    def measure(threads, chunk_mb):
+        apply(threads, chunk_mb)
+        stop_event.wait(AUTOTUNE_WINDOW_SEC / 4) # let in-flight reads of the old setting drain
+        with lock:
+            window["bytes"], window["latency"] = 0, LatencyHistogram()
+        t0 = time.perf_counter()
+        stop_event.wait(AUTOTUNE_WINDOW_SEC)
+        with lock:
+            nbytes, latency = window["bytes"], window["latency"]
+        if errors:
+            raise IOError(errors[0])
+        mb_s = nbytes / 1024**2 / (time.perf_counter() - t0)
+        p99 = latency.quantile(0.99)
+        step = {
+            "threads": threads,
+            "chunk_size_mb": chunk_mb,
+            "mb_s": mb_s,
+            "p99_ms": p99 * 1000,
+            "p99_ms_per_mb": p99 * 1000 / chunk_mb,
+            "reads": latency.count,
+        }
+        trajectory.append(step)
+        logger.info(f"Autotune: {threads} threads x {chunk_mb} MB -> {mb_s:.1f} MB/s, p99 {p99 * 1000:.1f} ms")
+        return step
+
+    def better(cand, best):
+        if cand["mb_s"] < best["mb_s"] * (1 + AUTOTUNE_MIN_GAIN):
+            return False # gains flattened
+        if best["p99_ms_per_mb"] and cand["p99_ms_per_mb"] > best["p99_ms_per_mb"] * AUTOTUNE_MAX_LATENCY_GROWTH:
+            return False # latency blew up
+        return True
+
+    def candidate(best, axis, factor):
+        threads, chunk_mb = best["threads"], best["chunk_size_mb"]
+        if axis == "threads":
+            threads = int(threads * factor)
+        else:
+            chunk_mb = int(chunk_mb * factor)
+        if not (1 <= threads <= AUTOTUNE_MAX_THREADS and 1 <= chunk_mb <= AUTOTUNE_MAX_CHUNK_MB):
+            return None
+        if threads > 1 and threads * chunk_mb * 1024 * 1024 > budget_bytes:
+            return None # would not fit the memory budget
+        return threads, chunk_mb
+
+    trajectory = []
+    start = time.time()
+    STATE["metrics"]["start_time"] = start
+    READ_STATS.reset(start)
+    t0 = time.perf_counter()
+    try:
+        best = measure(setting["threads"], setting["chunk_mb"])
+        improved = True
+        while improved and time.perf_counter() - t0 < AUTOTUNE_MAX_SEC:
+            improved = False
+            for axis in ("threads", "chunk"):
+                for factor in (2, 0.5):
+                    moved = False
+                    while time.perf_counter() - t0 < AUTOTUNE_MAX_SEC:
+                        step = candidate(best, axis, factor)
+                        if step is None: break
+                        result = measure(*step)
+                        if not better(result, best): break
+                        best, moved, improved = result, True, True
+                    if moved: break # no need to try the other direction
+        converged = not improved
+    finally:
+        stop_event.set()
+        with cond:
+            cond.notify_all()
+        for t in workers:
+            t.join()
+        cursor.close()
+    duration = time.perf_counter() - t0
+
+    config = {"READ_ENGINE": "ranged", "NUM_THREADS": best["threads"], "CHUNK_SIZE_MB": best["chunk_size_mb"]}
+    return {
+        "converged": converged,
+        "steps": len(trajectory),
+        "best": best,
+        # Drop-in settings for a production loader or --set-env-vars
+        "config": config,
+        "env": ",".join(f"{k}={v}" for k, v in config.items()),
+        "trajectory": trajectory,
+        "memory_budget": {"limit_bytes": budget_bytes, "source": budget_source},
+        "dataset_wraps": cursor.wraps,
+        "total_bytes": totals["bytes"],
+        "duration_sec": duration,
+    }
+
+class BlockCache:
+    """Read-through LRU cache of fixed-size blocks kept as files in a local directory.
+
+    A miss preads the block from the source, drops it from the page cache
+    so later misses still hit the mount, writes the copy and evicts least
+    recently used blocks until the cache fits `capacity`. Concurrent
+    misses on one block wait for the first fetch instead of repeating it.
+    """
+
+    def __init__(self, directory, block_size, capacity):
+        os.makedirs(directory)
+        self.directory = directory
+        self.block_size = block_size
+        self.capacity = capacity
+        self.blocks = {} # (path, block) -> (cache file, length), least recently used first
+        self.used = 0
+        self.peak = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self.fill_sec = 0.0
+        self.latency = {"hit": LatencyHistogram(), "miss": LatencyHistogram()}
+        self.bytes = {"hit": 0, "miss": 0}
+        self._fetching = {}
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def read(self, fd, path, block, view):
+        """Fills `view` with the block; returns (bytes, "hit" or "miss")."""
+        key = (path, block)
+        t0 = time.perf_counter()
+        while True:
+            with self._lock:
+                entry = self.blocks.pop(key, None)
+                if entry is not None:
+                    self.blocks[key] = entry # now most recently used
+                else:
+                    pending = self._fetching.get(key)
+                    if pending is None:
+                        self._fetching[key] = threading.Event()
+            if entry is not None:
+                try:
+                    with open(entry[0], "rb", buffering=0) as f:
+                        n = f.readinto(view[:entry[1]])
+                    return self._record("hit", n, t0)
+                except FileNotFoundError:
+                    continue # evicted between lookup and open
+            if pending is None:
+                break
+            pending.wait()
+
+        try:
+            n = pread_into(fd, view, block * self.block_size)
+            drop_cache(fd, block * self.block_size, n)
+            if n and n <= self.capacity:
+                t1 = time.perf_counter()
+                with self._lock:
+                    self._seq += 1
+                    name = os.path.join(self.directory, f"{self._seq}.blk")
+                with open(name, "wb") as f:
+                    f.write(view[:n])
+                self._insert(key, name, n, time.perf_counter() - t1)
+            return self._record("miss", n, t0)
+        finally:
+            with self._lock:
+                self._fetching.pop(key).set()
+
+    def _insert(self, key, name, n, fill_sec):
+        victims = []
+        with self._lock:
+            self.fill_sec += fill_sec
+            self.blocks[key] = (name, n)
+            self.used += n
+            while self.used > self.capacity:
+                victim = next(iter(self.blocks))
+                victim_name, victim_n = self.blocks.pop(victim)
+                victims.append(victim_name)
+                self.used -= victim_n
+                self.evictions += 1
+                self.evicted_bytes += victim_n
+            self.peak = max(self.peak, self.used)
+        for victim_name in victims:
+            os.unlink(victim_name)
+
+    def _record(self, kind, n, t0):
+        elapsed = time.perf_counter() - t0
+        with self._lock:
+            self.latency[kind].record(elapsed)
+            self.bytes[kind] += n
+        READ_STATS.record(n, elapsed)
+        return n, kind
+
+    def counts(self):
+        with self._lock:
+            return self.latency["hit"].count, self.latency["miss"].count
+
+    def report(self):
+        def side(kind):
+            hist = self.latency[kind]
+            return {
+                "reads": hist.count,
+                "bytes": self.bytes[kind],
+                # Per reader: bytes over the time readers spent on these reads
+                "mb_s_per_thread": (self.bytes[kind] / 1024**2) / hist.sum if hist.sum else 0,
+                "latency_ms": hist.summary_ms(),
+            }
+        hits, misses = self.latency["hit"].count, self.latency["miss"].count
+        total_bytes = self.bytes["hit"] + self.bytes["miss"]
+        return {
+            "hit_ratio": hits / (hits + misses) if hits + misses else 0,
+            "byte_hit_ratio": self.bytes["hit"] / total_bytes if total_bytes else 0,
+            "hits": side("hit"),
+            "misses": dict(side("miss"), fill_sec=self.fill_sec),
+            "evictions": self.evictions,
+            "evicted_bytes": self.evicted_bytes,
+            "peak_used_bytes": self.peak,
+        }
+
+def run_tiered_cache():
+    """Repeated loads of the dataset through a local read-through block cache.
+
+    Every pass reads all of MODEL_FILE in CACHE_BLOCK_MB blocks with
+    NUM_THREADS workers; misses come from the mount and fill a cache
+    under CACHE_DIR (tmpfs at /dev/shm, or a disk path) of at most
+    CACHE_CAPACITY_MB, evicting LRU blocks. Per-pass throughput shows the
+    first load against the cached ones; a capacity smaller than the
+    dataset under CACHE_ORDER=repeat shows LRU thrashing.
+    """
+    if CACHE_ORDER not in ("repeat", "shuffle"):
+        raise ValueError(f"Unknown cache order: {CACHE_ORDER}")
+    if CACHE_BLOCK_MB < 1 or CACHE_PASSES < 1:
+        raise ValueError("CACHE_BLOCK_MB and CACHE_PASSES must be >= 1")
+    files = [fp for fp in dataset_files() if os.path.getsize(fp)]
+    if not files:
+        raise FileNotFoundError(f"No non-empty files under {os.path.join(MOUNT_PATH, MODEL_FILE)}")
+    file_sizes = {fp: os.path.getsize(fp) for fp in files}
+    block_size = CACHE_BLOCK_MB * 1024 * 1024
+    if CACHE_CAPACITY_MB:
+        capacity, capacity_source = CACHE_CAPACITY_MB * 1024 * 1024, "CACHE_CAPACITY_MB"
+    else:
+        capacity, capacity_source = memory_budget()
+    # A fresh directory per run: CACHE_DIR itself may hold other data
+    directory = os.path.join(CACHE_DIR, f"run-{os.getpid()}-{time.time_ns()}")
+    cache = BlockCache(directory, block_size, capacity)
+
+    fds = {fp: os.open(fp, os.O_RDONLY) for fp in files}
+    buffers = threading.local()
+
+    def read_block(item):
+        fp, block = item
+        view = getattr(buffers, "view", None)
+        if view is None:
+            view = buffers.view = memoryview(bytearray(block_size))
+        n, _ = cache.read(fds[fp], fp, block, view)
+        return n
+
+    passes = []
+    total_bytes = 0
+    start = time.time()
+    STATE["metrics"]["start_time"] = start
+    READ_STATS.reset(start)
+    t0 = time.perf_counter()
+    try:
+        for fd in fds.values():
+            drop_cache(fd) # the first pass measures the mount, not memory
+        with concurrent.futures.ThreadPoolExecutor(max_workers=NUM_THREADS) as executor:
+            for n_pass in range(CACHE_PASSES):
+                order = list(files)
+                if CACHE_ORDER == "shuffle":
+                    random.Random(n_pass).shuffle(order)
+                work = [(fp, b) for fp in order for b in range(-(-file_sizes[fp] // block_size))]
+                hits0, misses0 = cache.counts()
+                p0 = time.perf_counter()
+                pass_bytes = sum(executor.map(read_block, work))
+                seconds = time.perf_counter() - p0
+                hits, misses = cache.counts()
+                total_bytes += pass_bytes
+                STATE["metrics"]["total_bytes"] = total_bytes
+                passes.append({
+                    "pass": n_pass,
+                    "seconds": seconds,
+                    "throughput_mb_s": (pass_bytes / 1024**2) / seconds if seconds else 0,
+                    "hit_ratio": (hits - hits0) / len(work) if work else 0,
+                })
+                logger.info(f"Cache pass {n_pass}: {passes[-1]['throughput_mb_s']:.2f} MB/s, "
+                            f"{passes[-1]['hit_ratio']:.1%} hits")
+        duration = time.perf_counter() - t0
+    finally:
+        for fd in fds.values():
+            os.close(fd)
+        shutil.rmtree(directory, ignore_errors=True)
+
+    return dict(cache.report(), **{
+        "cache_dir": CACHE_DIR,
+        "block_mb": CACHE_BLOCK_MB,
+        "capacity_bytes": capacity,
+        "capacity_source": capacity_source,
+        "dataset_bytes": sum(file_sizes.values()),
+        "files": len(files),
+        "order": CACHE_ORDER,
+        "concurrency": NUM_THREADS,
+        "passes": passes,
+        "total_bytes": total_bytes,
+        "duration_sec": duration,
+    })
+
+STAGE_MANIFEST = ".stage-manifest.json"
+
+def preallocate(fd, size):
+    """Sizes a destination file and reserves its blocks; returns False where fallocate is unsupported."""
+    os.ftruncate(fd, size)
+    if not size:
+        return True
+    try:
+        os.posix_fallocate(fd, 0, size)
+        return True
+    except OSError as e:
+        if e.errno not in (errno.EOPNOTSUPP, errno.EINVAL):
+            raise # ENOSPC: the copy would not fit
+        return False
+
+def stage_copy(src, dst, threads, range_size, chunk_size):
+    """Copies a file or directory tree into `dst`, like `cp -r src dst/`.
+
+    Destination files are preallocated, then `threads` workers pread
+    RANGE-sized pieces of the source and pwrite them in place. Finished
+    ranges are recorded in a manifest in `dst`, so rerunning an
+    interrupted copy only copies what is missing; the manifest is removed
+    once the copy is complete. Resume covers the process being killed,
+    not the machine losing unflushed writes.
+    """
+    if range_size < 1:
+        raise ValueError("range size must be >= 1 byte")
+    src = os.path.normpath(src)
+    name = os.path.basename(src)
+    if os.path.isdir(src):
+        files = [os.path.join(root, f) for root, _, names in os.walk(src) for f in names]
+        rel = {fp: os.path.join(name, os.path.relpath(fp, src)) for fp in files}
+    elif os.path.isfile(src):
+        files = [src]
+        rel = {src: name}
+    else:
+        raise FileNotFoundError(f"Source not found: {src}")
+    os.makedirs(dst, exist_ok=True)
+    manifest_path = os.path.join(dst, STAGE_MANIFEST)
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        manifest = {}
+
+    def save_manifest():
+        with open(manifest_path + ".tmp", "w") as f:
+            json.dump(manifest, f)
+        os.replace(manifest_path + ".tmp", manifest_path)
+
+    file_sizes = {}
+    src_fds, dst_fds = {}, {}
+    todo = []
+    totals = {"copied": 0, "resumed": 0, "saved_at": time.perf_counter()}
+    preallocated = True
+    lock = threading.Lock()
+    buffers = threading.local()
+
+    def copy_range(r):
+        fp, start, end = r
+        view = getattr(buffers, "view", None)
+        if view is None:
+            view = buffers.view = memoryview(bytearray(chunk_size))
+        offset = start
+        while offset < end:
+            t0 = time.perf_counter()
+            n = pread_into(src_fds[fp], view[:min(chunk_size, end - offset)], offset)
+            READ_STATS.record(n, time.perf_counter() - t0)
+            if not n:
+                raise IOError(f"Short read in {fp} at {offset}: the source shrank while staging")
+            written = 0
+            while written < n:
+                written += os.pwrite(dst_fds[fp], view[written:n], offset + written)
+            offset += n
+        with lock:
+            manifest[rel[fp]]["done"].append([start, end])
+            totals["copied"] += end - start
+            STATE["metrics"]["total_bytes"] = totals["copied"]
+            # Bounded rewrite rate: trees of small files finish many ranges a second
+            if time.perf_counter() - totals["saved_at"] > 0.5:
+                save_manifest()
+                totals["saved_at"] = time.perf_counter()
+
+    t0 = time.perf_counter()
+    complete = False
+    try:
+        for fp in files:
+            st = os.stat(fp)
+            file_sizes[fp] = st.st_size
+            target = os.path.join(dst, rel[fp])
+            entry = manifest.get(rel[fp])
+            if not (entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns
+                    and os.path.exists(target)):
+                entry = manifest[rel[fp]] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "done": []}
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            src_fds[fp] = os.open(fp, os.O_RDONLY)
+            dst_fds[fp] = os.open(target, os.O_WRONLY | os.O_CREAT, 0o644)
+            if not entry["done"]:
+                preallocated &= preallocate(dst_fds[fp], st.st_size)
+            done = {tuple(r) for r in entry["done"]}
+            for r in plan_ranges([fp], file_sizes, range_size, chunk_size, threads):
+                if (r[1], r[2]) in done:
+                    totals["resumed"] += r[2] - r[1]
+                else:
+                    todo.append(r)
+        if totals["resumed"]:
+            logger.info(f"Resuming stage: {totals['resumed'] / 1024**2:.0f} MB already copied.")
+        with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+            for _ in executor.map(copy_range, todo):
+                pass
+        complete = True
+    finally:
+        for fd in list(src_fds.values()) + list(dst_fds.values()):
+            os.close(fd)
+        if complete:
+            try:
+                os.remove(manifest_path)
+            except FileNotFoundError:
+                pass
+        elif manifest:
+            save_manifest()
+    seconds = time.perf_counter() - t0
+    return {
+        "source": src,
+        "target": os.path.join(dst, name),
+        "files": len(files),
+        "bytes": sum(file_sizes.values()),
+        "copied_bytes": totals["copied"],
+        "resumed_bytes": totals["resumed"],
+        "ranges": len(todo),
+        "preallocated": preallocated,
+        "seconds": seconds,
+        "throughput_mb_s": (totals["copied"] / 1024**2) / seconds if seconds else 0,
+    }
+
+def parallel_load(files, threads, range_size, chunk_size):
+    """Reads every file with ranged preads on `threads` workers; returns (bytes, seconds)."""
+    file_sizes = {fp: os.path.getsize(fp) for fp in files}
+    buffers = threading.local()
+
+    def read_range(r):
+        fp, start, end = r
+        view = getattr(buffers, "view", None)
+        if view is None:
+            view = buffers.view = memoryview(bytearray(chunk_size))
+        fd = os.open(fp, os.O_RDONLY)
+        try:
+            offset = start
+            while offset < end:
+                t0 = time.perf_counter()
+                n = pread_into(fd, view[:min(chunk_size, end - offset)], offset)
+                READ_STATS.record(n, time.perf_counter() - t0)
+                if not n: break
+                offset += n
+        finally:
+            os.close(fd)
+        return offset - start
+
+    t0 = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+        total = sum(executor.map(read_range, plan_ranges(files, file_sizes, range_size, chunk_size, threads)))
+    return total, time.perf_counter() - t0
+
+def run_stage():
+    """Stage-then-load against loading straight from the mount.
+
+    Reads the dataset from the mount with the same ranged readers the
+    copy uses (direct load), copies it to STAGE_PATH with stage_copy,
+    then loads the local copy. Source pages are dropped before each mount
+    pass; the local load runs right after the copy, as a service would.
+    """
+    src = os.path.join(MOUNT_PATH, MODEL_FILE)
+    files = dataset_files()
+    range_size = STAGE_RANGE_MB * 1024 * 1024
+    chunk_size = CHUNK_SIZE_MB * 1024 * 1024
+
+    def drop_source():
+        for fp in files:
+            fd = os.open(fp, os.O_RDONLY)
+            try:
+                drop_cache(fd)
+            finally:
+                os.close(fd)
+
+    start = time.time()
+    STATE["metrics"]["start_time"] = start
+    READ_STATS.reset(start)
+    t0 = time.perf_counter()
+    drop_source()
+    direct_bytes, direct_sec = parallel_load(files, NUM_THREADS, range_size, chunk_size)
+    drop_source()
+    staged = stage_copy(src, STAGE_PATH, NUM_THREADS, range_size, chunk_size)
+    target = staged["target"]
+    try:
+        local_files = [target] if os.path.isfile(target) else \
+            [os.path.join(root, f) for root, _, names in os.walk(target) for f in names]
+        local_bytes, local_sec = parallel_load(local_files, NUM_THREADS, range_size, chunk_size)
+    finally:
+        if not STAGE_KEEP:
+            if os.path.isdir(target):
+                shutil.rmtree(target, ignore_errors=True)
+            elif os.path.exists(target):
+                os.remove(target)
+    duration = time.perf_counter() - t0
+
+    def phase(n, seconds):
+        return {"bytes": n, "seconds": seconds, "throughput_mb_s": (n / 1024**2) / seconds if seconds else 0}
+
+    staged_total = staged["seconds"] + local_sec
+    return {
+        "source": src,
+        "target": target,
+        "kept": STAGE_KEEP,
+        "range_mb": STAGE_RANGE_MB,
+        "concurrency": NUM_THREADS,
+        "direct_load": phase(direct_bytes, direct_sec),
+        "stage": staged,
+        "local_load": phase(local_bytes, local_sec),
+        "stage_plus_load_sec": staged_total,
+        # Above 1 means staging first gets the model loaded sooner
+        "staging_speedup": direct_sec / staged_total if staged_total else None,
+        "total_bytes": direct_bytes + staged["copied_bytes"] + local_bytes,
+        "duration_sec": duration,
+    }
+
+BENCHMARK_MODES = {
+    "safetensors": run_safetensors_load,
+    "lazy_mmap": run_lazy_mmap,
+    "write": run_write_checkpoint,
+    "random_read": run_random_read,
+    "metadata": run_metadata,
+    "autotune": run_autotune,
+    "tiered_cache": run_tiered_cache,
+    "stage": run_stage,
+}
+
+def run_mode(mode, in_sweep=False):
+    """Runs a non-stream benchmark mode and publishes its results like a stream run."""
+    runner = BENCHMARK_MODES.get(mode)
+    if runner is None:
+        raise ValueError(f"Unknown benchmark mode: {mode}")
+    details = runner()
+    m = STATE["metrics"]
+    m["end_time"] = time.time()
+    m["duration_sec"] = details["duration_sec"]
+    m["total_bytes"] = details["total_bytes"]
+    m["throughput_mb_s"] = (m["total_bytes"] / 1024**2) / m["duration_sec"] if m["duration_sec"] else 0
+    m["read_stats"] = READ_STATS.summary()
+    m["mode_details"] = details
+    m["resources"] = RESOURCES.stop()
+    if not in_sweep:
+        STATE["status"] = "completed"
+    logger.info(f"{mode} benchmark finished. {m['throughput_mb_s']:.2f} MB/s")
+    return True
+
+def perform_benchmark(in_sweep=False):
+    """Runs one benchmark with the current config; returns True on success.
+
+    Sweep points leave the overall status as "running" between points.
+    """
     global STATE
     STATE["status"] = "running"
+    STATE["error"] = None
     STATE["metrics"]["start_time"] = time.time()
     STATE["metrics"]["total_bytes"] = 0
+    STATE["metrics"]["chunks_processed"] = 0
+    STATE["metrics"]["allocation"] = {}
+    STATE["metrics"]["reassembly"] = {}
+    STATE["metrics"]["files_processed"] = 0
+    STATE["metrics"]["page_faults"] = {}
+    STATE["metrics"]["cache"] = {}
+    STATE["metrics"]["read_stats"] = {}
+    STATE["metrics"]["consumer_work"] = {}
+    STATE["metrics"]["verification"] = {}
+    STATE["metrics"]["mode_details"] = {}
+    STATE["metrics"]["workers"] = {}
+    STATE["metrics"]["gcs"] = {}
+    STATE["metrics"]["prefetch"] = {}
+    STATE["metrics"]["discovery_sec"] = 0
+    STATE["metrics"]["resources"] = {}
+    STATE["metrics"]["memory_budget"] = {}
+    usage_start = resource.getrusage(resource.RUSAGE_SELF)
+    RESOURCES.start()
     
     logger.info(f"Starting benchmark. Config: {STATE['config']}")
     
+    shm = None
     try:
+        if BENCHMARK_MODE != "stream":
+            return run_mode(BENCHMARK_MODE, in_sweep)
+        load_torch() # first run only, before the clock restarts for the pipeline
+
         # 1. Identify Source
         target_files = []
+        file_sizes = {}
+        gcs = None
+        expected_crc32c = {}
         if USE_SYNTHETIC:
             logger.info(f"Using SYNTHETIC data ({SYNTHETIC_SIZE_GB} GB)")
             # Generator logic handled in consumer
+        elif READ_ENGINE == "gcs":
+            if not GCS_BUCKET:
+                raise ValueError("The gcs engine needs GCS_BUCKET")
+            gcs = GcsReader(GCS_BUCKET, NUM_THREADS, endpoint=GCS_ENDPOINT, keepalive=GCS_KEEPALIVE)
+            objects = gcs.list_objects(MODEL_FILE)
+            target_files = [name for name, _, _ in objects]
+            file_sizes = {name: size for name, size, _ in objects}
+            # The listing already carries the checksums VERIFY compares against
+            expected_crc32c = {name: crc for name, _, crc in objects if crc is not None}
+            logger.info(f"Found {len(target_files)} objects in gs://{GCS_BUCKET} via {gcs.endpoint}.")
         else:
-            full_path = os.path.join(MOUNT_PATH, MODEL_FILE)
-            if os.path.isdir(full_path):
-                for root, _, files in os.walk(full_path):
-                    for f in files:
-                        target_files.append(os.path.join(root, f))
-            elif os.path.isfile(full_path):
-                target_files = [full_path]
-            else:
-                raise FileNotFoundError(f"Source not found: {full_path}")
+            t0 = time.perf_counter()
+            target_files = dataset_files()
+            file_sizes = {fp: os.path.getsize(fp) for fp in target_files}
+            STATE["metrics"]["discovery_sec"] = time.perf_counter() - t0
             
-            logger.info(f"Found {len(target_files)} files to read.")
+            logger.info(f"Found {len(target_files)} files to read in {STATE['metrics']['discovery_sec']:.2f}s.")
+
+        if VERIFY and target_files and gcs is None:
+            expected_crc32c = load_expected_crc32c(target_files)
+
+        # Page cache state decides whether this run measures the mount or memory
+        resident_before = probe_residency(file_sizes) if file_sizes and gcs is None else None
+        if resident_before is not None:
+            logger.info(f"{resident_before:.1%} of the dataset is already in the page cache.")
 
         # 2. Pipeline Components
-        q = queue.Queue(maxsize=NUM_THREADS * 2)
+        q = TimedQueue(maxsize=NUM_THREADS * 2)
+        RESOURCES.watch(q)
         stop_event = threading.Event()
+        chunk_size = CHUNK_SIZE_MB * 1024 * 1024
+
+        # Validate before allocating anything
+        chunk_work(CONSUMER_WORK, b"")
+        if SCHEDULER not in ("fifo", "lpt"):
+            raise ValueError(f"Unknown scheduler: {SCHEDULER}")
+        if PREFETCH not in ("none", "willneed", "warm"):
+            raise ValueError(f"Unknown prefetch mode: {PREFETCH}")
+        if READ_ENGINE == "direct" and not USE_SYNTHETIC and CACHE_BYPASS not in ("o_direct", "fadvise"):
+            raise ValueError(f"Unknown cache bypass: {CACHE_BYPASS}")
+        budget_bytes, budget_source = memory_budget()
+        budget_slots = max(1, budget_bytes // chunk_size)
+        budget = None
+        ring = None
+        shm = None
+        pool_size = 0
+        wanted_slots = None
+        if USE_SYNTHETIC:
+            # One slot per queue entry, plus one held by the consumer and
+            # one being handed out by the producer.
+            wanted_slots = q.maxsize + 2
+            ring = BufferRing(min(wanted_slots, budget_slots), chunk_size, content=SYNTHETIC_CONTENT)
+        elif READ_ENGINE in ("pooled", "ranged", "direct", "gcs"):
+            # Every reader thread may be filling a buffer while the queue is
+            # full and the consumer holds one more.
+            wanted_slots = POOL_BUFFERS or (q.maxsize + NUM_THREADS + 1)
+            pool_size = min(wanted_slots, budget_slots)
+            ring = BufferRing(pool_size, chunk_size, aligned=READ_ENGINE == "direct")
+        elif READ_ENGINE == "process":
+            # Same slot budget as the pooled engines, carved out of one
+            # shared memory segment the workers inherit.
+            wanted_slots = POOL_BUFFERS or (q.maxsize + NUM_THREADS + 1)
+            pool_size = min(wanted_slots, budget_slots)
+            shm = shared_memory.SharedMemory(create=True, size=pool_size * chunk_size)
+        elif READ_ENGINE == "buffered":
+            # Fresh buffer per chunk: producers reserve bytes before each read
+            budget = ByteBudget(budget_bytes)
+        elif READ_ENGINE != "mmap": # page cache backed, reclaimable; not budgeted
+            raise ValueError(f"Unknown read engine: {READ_ENGINE}")
+        if wanted_slots is not None and wanted_slots > budget_slots:
+            logger.warning(f"Buffer pool capped at {budget_slots} x {CHUNK_SIZE_MB} MB by the memory budget "
+                           f"({budget_bytes / 1024**2:.0f} MB, {budget_source}); wanted {wanted_slots}.")
+
+        # Worker processes do the per-chunk work themselves; otherwise the consumer does
+        work = {
+            "kind": CONSUMER_WORK,
+            "where": "worker_processes" if READ_ENGINE == "process" and not USE_SYNTHETIC else "consumer_thread",
+            "seconds": 0.0,
+        }
+        worker_read = {"seconds": 0.0} # pread time inside the worker processes
+
+        bypass = None
+        open_flags = os.O_RDONLY
+        if READ_ENGINE == "direct" and not USE_SYNTHETIC:
+            bypass = CACHE_BYPASS
+            if bypass == "o_direct":
+                if chunk_size % mmap.PAGESIZE or (RANGE_SIZE_MB * 1024 * 1024) % mmap.PAGESIZE:
+                    raise ValueError("O_DIRECT needs page-aligned chunk and range sizes")
+                try:
+                    os.close(os.open(target_files[0], os.O_RDONLY | os.O_DIRECT))
+                    open_flags |= os.O_DIRECT
+                except (OSError, AttributeError, IndexError) as e:
+                    # tmpfs and some FUSE configs reject O_DIRECT
+                    logger.warning(f"O_DIRECT unavailable ({e}), falling back to fadvise")
+                    bypass = "fadvise"
         
+        # Read-ahead only helps engines that read through the page cache
+        prefetcher = None
+        if PREFETCH != "none" and not USE_SYNTHETIC:
+            if READ_ENGINE in ("buffered", "pooled", "ranged"):
+                prefetcher = Prefetcher(PREFETCH, PREFETCH_WINDOW_MB * 1024 * 1024, PREFETCH_THREADS or NUM_THREADS)
+            else:
+                logger.warning(f"Prefetch applies to the buffered, pooled and ranged engines; ignored for {READ_ENGINE}.")
+
+        worker_times = WorkerTimes()
+
         # Producer (IO)
-        def producer():
+        def produce():
             total_read = 0
-            chunk_size = CHUNK_SIZE_MB * 1024 * 1024
             
             if USE_SYNTHETIC:
-                # Synthetic Generator
+                # Synthetic Generator: lend out ring slots, never allocate
                 target_bytes = int(SYNTHETIC_SIZE_GB * 1024**3)
                 while total_read < target_bytes and not stop_event.is_set():
-                    # Generate dummy chunk
-                    # faster to use pre-allocated buffer? 
-                    chunk = b'0' * chunk_size 
-                    q.put(chunk)
-                    total_read += len(chunk)
+                    t0 = time.perf_counter()
+                    slot = ring.acquire(stop_event)
+                    if slot is None: break
+                    idx, view = slot
+                    n = min(chunk_size, target_bytes - total_read)
+                    READ_STATS.record(n, time.perf_counter() - t0)
+                    q.put(Chunk(view[:n], offset=total_read, release=lambda i=idx: ring.release(i)))
+                    total_read += n
             else:
                 # File Reader
                 def read_file(fp):
+                    ahead = None
                     try:
                         with open(fp, "rb") as f:
+                            if prefetcher is not None:
+                                ahead = prefetcher.cursor(f.fileno(), 0, file_sizes[fp])
                             while not stop_event.is_set():
+                                if not budget.acquire(chunk_size, stop_event): break
+                                offset = f.tell()
+                                if ahead is not None:
+                                    ahead.before_read(offset, chunk_size)
+                                t0 = time.perf_counter()
                                 chunk = f.read(chunk_size)
+                                budget.release(chunk_size - len(chunk)) # short read at EOF
                                 if not chunk: break
-                                q.put(chunk)
+                                READ_STATS.record(len(chunk), time.perf_counter() - t0)
+                                q.put(Chunk(chunk, path=fp, offset=offset, release=lambda n=len(chunk): budget.release(n)))
                     except Exception as e:
                         logger.error(f"Error reading {fp}: {e}")
                         raise e
+                    finally:
+                        if ahead is not None:
+                            ahead.close()
 
-                with concurrent.futures.ThreadPoolExecutor(max_workers=NUM_THREADS) as executor:
-                    futures = [executor.submit(read_file, fp) for fp in target_files]
-                    concurrent.futures.wait(futures)
-            
-            q.put(None) # Sentinel
+                # Pooled Reader: fill recycled buffers in place with readinto
+                def read_file_pooled(fp):
+                    ahead = None
+                    try:
+                        with open(fp, "rb", buffering=0) as f:
+                            if prefetcher is not None:
+                                ahead = prefetcher.cursor(f.fileno(), 0, file_sizes[fp])
+                            offset = 0
+                            while not stop_event.is_set():
+                                slot = ring.acquire(stop_event)
+                                if slot is None: break
+                                idx, view = slot
+                                if ahead is not None:
+                                    ahead.before_read(offset, len(view))
+                                t0 = time.perf_counter()
+                                n = 0
+                                while n < len(view):
+                                    got = f.readinto(view[n:])
+                                    if not got: break
+                                    n += got
+                                if not n:
+                                    ring.release(idx)
+                                    break
+                                READ_STATS.record(n, time.perf_counter() - t0)
+                                q.put(Chunk(view[:n], path=fp, offset=offset, release=lambda i=idx: ring.release(i)))
+                                offset += n
+                    except Exception as e:
+                        logger.error(f"Error reading {fp}: {e}")
+                        raise e
+                    finally:
+                        if ahead is not None:
+                            ahead.close()
+
+                # Ranged Reader: pread one byte range of a file at explicit offsets.
+                # The direct engine uses it with O_DIRECT, or drops the range
+                # from the page cache before and after reading it.
+                def read_range(fp, start, end):
+                    try:
+                        fd = os.open(fp, open_flags)
+                        ahead = prefetcher.cursor(fd, start, end) if prefetcher is not None else None
+                        try:
+                            if bypass == "fadvise":
+                                drop_cache(fd, start, end - start)
+                            offset = start
+                            while offset < end and not stop_event.is_set():
+                                slot = ring.acquire(stop_event)
+                                if slot is None: break
+                                idx, view = slot
+                                want = min(chunk_size, end - offset)
+                                if ahead is not None:
+                                    ahead.before_read(offset, want)
+                                t0 = time.perf_counter()
+                                if open_flags & getattr(os, "O_DIRECT", 0):
+                                    # Aligned length; the kernel returns short only at EOF
+                                    n = os.preadv(fd, [view[:-(-want // mmap.PAGESIZE) * mmap.PAGESIZE]], offset)
+                                    n = min(n, want)
+                                else:
+                                    n = pread_into(fd, view[:want], offset)
+                                if not n:
+                                    ring.release(idx)
+                                    break
+                                READ_STATS.record(n, time.perf_counter() - t0)
+                                q.put(Chunk(view[:n], path=fp, offset=offset, release=lambda i=idx: ring.release(i)))
+                                offset += n
+                            if bypass == "fadvise":
+                                drop_cache(fd, start, end - start)
+                        finally:
+                            if ahead is not None:
+                                ahead.close()
+                            os.close(fd)
+                    except Exception as e:
+                        logger.error(f"Error reading {fp} [{start}:{end}]: {e}")
+                        raise e
+
+                # GCS Reader: one ranged GET per part, streamed straight into
+                # pooled buffers from the response socket.
+                def read_gcs_range(name, start, end):
+                    try:
+                        resp = gcs.open_range(name, start, end)
+                        try:
+                            offset = start
+                            while offset < end and not stop_event.is_set():
+                                slot = ring.acquire(stop_event)
+                                if slot is None: break
+                                idx, view = slot
+                                want = min(chunk_size, end - offset)
+                                t0 = time.perf_counter()
+                                n = 0
+                                while n < want:
+                                    got = resp.raw.readinto(view[n:want])
+                                    if not got: break
+                                    n += got
+                                if not n:
+                                    ring.release(idx)
+                                    break
+                                READ_STATS.record(n, time.perf_counter() - t0)
+                                q.put(Chunk(view[:n], path=name, offset=offset, release=lambda i=idx: ring.release(i)))
+                                offset += n
+                        finally:
+                            gcs.close_range(resp)
+                        if offset < end and not stop_event.is_set():
+                            raise IOError(f"short read: got {offset - start} of {end - start} bytes")
+                    except Exception as e:
+                        logger.error(f"Error reading gs://{GCS_BUCKET}/{name} [{start}:{end}]: {e}")
+                        raise e
+
+                # Mmap Reader: map every file, then each worker faults in a
+                # strided slice of the chunks and hands out zero-copy views.
+                def map_chunks():
+                    chunks = []
+                    for fp in target_files:
+                        size = file_sizes[fp]
+                        if not size: continue # empty files cannot be mapped
+                        with open(fp, "rb") as f:
+                            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                        # The views keep the mapping alive; it is unmapped once
+                        # the consumer has dropped the last one.
+                        view = memoryview(mm)
+                        for start in range(0, size, chunk_size):
+                            chunks.append((fp, start, view[start:start + chunk_size]))
+                    return chunks
+
+                def touch_chunks(work):
+                    try:
+                        for fp, start, view in work:
+                            if stop_event.is_set(): break
+                            t0 = time.perf_counter()
+                            view[::mmap.PAGESIZE].tobytes() # one byte per page faults the chunk in
+                            READ_STATS.record(len(view), time.perf_counter() - t0)
+                            q.put(Chunk(view, path=fp, offset=start))
+                    except Exception as e:
+                        logger.error(f"Error mapping chunks: {e}")
+                        raise e
+
+                # Process Reader: worker processes pread into shared memory and
+                # send back (slot, offset, length) descriptors only.
+                def read_with_processes():
+                    ctx = multiprocessing.get_context("fork") # spawn would re-import server.py
+                    tasks, free_slots, results = ctx.Queue(), ctx.Queue(), ctx.Queue()
+                    for slot in range(pool_size):
+                        free_slots.put(slot)
+                    ranges = plan_work()
+                    for r in ranges:
+                        tasks.put(r)
+                    procs = [ctx.Process(target=process_reader, daemon=True,
+                                         args=(tasks, free_slots, results, shm.buf, chunk_size, CONSUMER_WORK))
+                             for _ in range(NUM_THREADS)]
+                    for p in procs:
+                        tasks.put(None)
+                        p.start()
+                    logger.info(f"Started {len(procs)} reader processes for {len(ranges)} ranges.")
+                    done = 0
+                    errors = []
+                    try:
+                        while done < len(procs) and not errors:
+                            try:
+                                msg = results.get(timeout=0.5)
+                            except queue.Empty:
+                                if stop_event.is_set() or not any(p.is_alive() for p in procs): break
+                                continue
+                            if msg[0] == "chunk":
+                                _, pid, slot, fp, offset, n, read_sec, work_sec = msg
+                                READ_STATS.record(n, read_sec, source=f"process-{pid}")
+                                work["seconds"] += work_sec
+                                worker_read["seconds"] += read_sec
+                                base = slot * chunk_size
+                                q.put(Chunk(shm.buf[base:base + n], path=fp, offset=offset,
+                                            release=lambda s=slot: free_slots.put(s)))
+                            elif msg[0] == "error":
+                                logger.error(f"Reader process {msg[1]} failed: {msg[2]}")
+                                errors.append(msg[2])
+                            else:
+                                _, pid, busy, n_tasks = msg
+                                worker_times.add(f"process-{pid}", busy, n_tasks)
+                                done += 1
+                    finally:
+                        for p in procs:
+                            free_slots.put(None) # unblock workers waiting for a slot
+                        for p in procs:
+                            p.join(timeout=5)
+                            if p.is_alive(): p.terminate()
+                    if errors:
+                        raise IOError(f"Reader process failed: {errors[0]}")
+
+                def plan_work(range_size_mb=RANGE_SIZE_MB):
+                    plan = plan_lpt if SCHEDULER == "lpt" else plan_ranges
+                    ranges = plan(target_files, file_sizes, range_size_mb * 1024 * 1024, chunk_size, NUM_THREADS)
+                    logger.info(f"Split {len(target_files)} files into {len(ranges)} ranges ({SCHEDULER}).")
+                    return ranges
+
+                if READ_ENGINE == "process":
+                    read_with_processes()
+                    return
+
+                with concurrent.futures.ThreadPoolExecutor(max_workers=NUM_THREADS, thread_name_prefix="reader") as executor:
+                    if READ_ENGINE == "mmap":
+                        chunks = map_chunks()
+                        futures = [executor.submit(worker_times.timed(touch_chunks), chunks[w::NUM_THREADS]) for w in range(NUM_THREADS)]
+                        del chunks
+                    elif READ_ENGINE in ("ranged", "direct"):
+                        # The executor's queue is the shared work queue: idle
+                        # workers take the next range in plan order.
+                        futures = [executor.submit(worker_times.timed(read_range), *r) for r in plan_work()]
+                    elif READ_ENGINE == "gcs":
+                        futures = [executor.submit(worker_times.timed(read_gcs_range), *r) for r in plan_work(GCS_PART_SIZE_MB)]
+                    else:
+                        reader = worker_times.timed(read_file_pooled if READ_ENGINE == "pooled" else read_file)
+                        files = target_files
+                        if SCHEDULER == "lpt":
+                            files = sorted(target_files, key=file_sizes.get, reverse=True) # whole files: sort only
+                        futures = [executor.submit(reader, fp) for fp in files]
+                    done, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_EXCEPTION)
+                    if any(f.exception() for f in done):
+                        stop_event.set() # the run has failed; don't read the rest
+                for f in futures:
+                    f.result() # re-raise the first reader error
+
+        producer_errors = []
+
+        def producer():
+            """Runs produce() and always ends the stream, so a failed read cannot strand the consumer."""
+            try:
+                produce()
+            except Exception as e:
+                logger.error(f"Producer failed: {e}")
+                producer_errors.append(e)
+                stop_event.set()
+            finally:
+                while True: # Sentinel
+                    try:
+                        q.put(None, timeout=0.5)
+                        break
+                    except queue.Full:
+                        if not consumer_alive.is_set(): break # nobody left to drain the queue
 
         # Consumer (GPU/Memory)
+        tracker = ReassemblyTracker(file_sizes) if file_sizes else None
+        verifier = ChunkVerifier(VERIFY_THREADS or NUM_THREADS) if VERIFY else None
+
         def consumer():
             total_processed = 0
+            chunks = 0
             while True:
-                chunk = q.get()
-                if chunk is None: break
+                item = q.get()
+                if item is None: break
+                chunk = item.data
+
+                if work["where"] == "consumer_thread" and CONSUMER_WORK != "none":
+                    t0 = time.perf_counter()
+                    chunk_work(CONSUMER_WORK, chunk)
+                    work["seconds"] += time.perf_counter() - t0
                 
                 # Check GPU
                 if STATE["config"]["gpu_available"]:
@@ -151,7 +3075,15 @@ def perform_benchmark():
                         pass
 
                 total_processed += len(chunk)
+                chunks += 1
+                if tracker is not None and tracker.add(item.path, item.offset, len(chunk)):
+                    STATE["metrics"]["files_processed"] = tracker.files_complete
+                if verifier is not None:
+                    verifier.submit(item, len(chunk)) # returns the buffer once hashed
+                else:
+                    item.done()
                 STATE["metrics"]["total_bytes"] = total_processed
+                STATE["metrics"]["chunks_processed"] = chunks
                 
                 # Update realtime throughput
                 duration = time.time() - STATE["metrics"]["start_time"]
@@ -161,29 +3093,417 @@ def perform_benchmark():
             return total_processed
 
         # Start Threads
-        prod_thread = threading.Thread(target=producer)
+        # Setup (file discovery, buffers, cache probe) is not I/O; start the clock here.
+        STATE["metrics"]["start_time"] = time.time()
+        READ_STATS.reset(STATE["metrics"]["start_time"])
+        consumer_alive = threading.Event()
+        consumer_alive.set()
+        prod_thread = threading.Thread(target=producer, name="producer")
         prod_thread.start()
         
-        consumer() # Run consumer in main thread (of this function)
-        
-        prod_thread.join()
+        try:
+            consumer() # Run consumer in main thread (of this function)
+        finally:
+            consumer_alive.clear()
+            stop_event.set() # Unblock the producer if the consumer bailed out
+            if verifier is not None:
+                verifier.finish() # hashing is part of the measured run
+            prod_thread.join()
+            if prefetcher is not None:
+                prefetcher.close()
+            if shm is not None:
+                release_shared_memory(shm)
+                shm = None
+        if producer_errors:
+            raise producer_errors[0]
+        if tracker is not None and tracker.files_complete < len(file_sizes):
+            raise IOError(f"Incomplete read: {tracker.files_complete} of {len(file_sizes)} files arrived whole")
         
         # Finish
         duration = time.time() - STATE["metrics"]["start_time"]
         STATE["metrics"]["end_time"] = time.time()
         STATE["metrics"]["duration_sec"] = duration
         STATE["metrics"]["throughput_mb_s"] = (STATE["metrics"]["total_bytes"] / 1024**2) / duration
-        STATE["status"] = "completed"
+        STATE["metrics"]["allocation"] = allocation_report(
+            STATE["metrics"]["chunks_processed"], STATE["metrics"]["total_bytes"],
+            pool=(ring.count, ring.size) if ring else ((pool_size, chunk_size) if shm else None),
+            zero_copy=READ_ENGINE == "mmap" and not USE_SYNTHETIC)
+        STATE["metrics"]["read_stats"] = READ_STATS.summary()
+        STATE["metrics"]["consumer_work"] = work
+        if not USE_SYNTHETIC:
+            STATE["metrics"]["workers"] = worker_times.report(STATE["metrics"]["start_time"], STATE["metrics"]["end_time"])
+        if verifier is not None:
+            STATE["metrics"]["verification"] = verifier.report(expected_crc32c, file_sizes)
+            logger.info(f"Verification: {STATE['metrics']['verification']['status']}")
+        if tracker is not None:
+            STATE["metrics"]["reassembly"] = tracker.report()
+        if gcs is not None:
+            STATE["metrics"]["gcs"] = gcs.report()
+        if prefetcher is not None:
+            STATE["metrics"]["prefetch"] = prefetcher.report()
+            logger.info(f"Prefetch ({PREFETCH}): {STATE['metrics']['prefetch']['coverage'] or 0:.1%} of reads found resident.")
+        # buffered reserves bytes per chunk; pooled engines size their pool to fit
+        pool_capped = wanted_slots is not None and wanted_slots > budget_slots
+        throttled = None # process workers wait for slots in their own processes
+        if budget is not None:
+            throttled = budget.throttled
+        elif ring is not None:
+            throttled = ring.wait if pool_capped else 0.0
+        STATE["metrics"]["memory_budget"] = {
+            "limit_bytes": budget_bytes,
+            "source": budget_source,
+            "applies_to": "per_chunk" if budget else ("buffer_pool" if wanted_slots is not None else "none"),
+            "pool_slots": (ring.count if ring else pool_size) if wanted_slots is not None else None,
+            "pool_capped": pool_capped,
+            "peak_in_flight_bytes": budget.peak if budget else None,
+            "throttled_sec": throttled,
+            "throttle_events": budget.throttle_events if budget else None,
+        }
+        producer_wait = ring.wait if ring else (budget.throttled if budget else 0.0)
+        worker_split = (worker_read["seconds"], work["seconds"]) if work["where"] == "worker_processes" else None
+        STATE["metrics"]["resources"] = RESOURCES.stop(q, duration, buffer_wait=producer_wait, worker_split=worker_split)
+        logger.info(f"Bottleneck: {STATE['metrics']['resources']['verdict']} ({STATE['metrics']['resources']['verdict_reason']})")
+        usage_end = resource.getrusage(resource.RUSAGE_SELF)
+        STATE["metrics"]["page_faults"] = {
+            "major": usage_end.ru_majflt - usage_start.ru_majflt,
+            "minor": usage_end.ru_minflt - usage_start.ru_minflt,
+        }
+        if file_sizes and gcs is None:
+            STATE["metrics"]["cache"] = {
+                "resident_fraction_before": resident_before,
+                "resident_fraction_after": probe_residency(file_sizes),
+                "bypass": bypass,
+                "label": cache_label(resident_before, bypass),
+            }
+        if not in_sweep:
+            STATE["status"] = "completed"
         logger.info(f"Benchmark finished. {STATE['metrics']['throughput_mb_s']:.2f} MB/s")
+        return True
 
     except Exception as e:
         logger.error(f"Benchmark failed: {e}")
+        if shm is not None: # failed after allocating, before the pipeline's own cleanup
+            release_shared_memory(shm)
+        STATE["metrics"]["resources"] = RESOURCES.stop()
+        if not in_sweep:
+            STATE["status"] = "error"
+        STATE["error"] = str(e)
+        return False
+
+def apply_overrides(data):
+    """Applies per-run config overrides (from /start or a sweep point)."""
+    global SYNTHETIC_SIZE_GB, SYNTHETIC_CONTENT, READ_ENGINE, RANGE_SIZE_MB, CACHE_BYPASS
+    global CHUNK_SIZE_MB, NUM_THREADS, CONSUMER_WORK, VERIFY, BENCHMARK_MODE, ACCESS_ORDER, SCHEDULER
+    global GCS_PART_SIZE_MB, GCS_KEEPALIVE, MEMORY_BUDGET_MB, PREFETCH, PREFETCH_WINDOW_MB
+    global WRITE_SIZE_GB, WRITE_FILES, WRITE_LAYOUT, WRITE_FSYNC, WRITE_ATOMIC
+    global RANDOM_IO_KB, RANDOM_DIST, ZIPF_S, RANDOM_DURATION_SEC, METADATA_MAX_FILES
+    global CACHE_BLOCK_MB, CACHE_CAPACITY_MB, CACHE_PASSES, CACHE_ORDER, STAGE_RANGE_MB, STAGE_KEEP
+    if "synthetic_size_gb" in data:
+        SYNTHETIC_SIZE_GB = float(data["synthetic_size_gb"])
+    if "synthetic_content" in data:
+        SYNTHETIC_CONTENT = str(data["synthetic_content"]).lower()
+        STATE["config"]["synthetic_content"] = SYNTHETIC_CONTENT
+    if "engine" in data:
+        if str(data["engine"]).lower() not in READ_ENGINES:
+            raise ValueError(f"Unknown read engine: {data['engine']}")
+        READ_ENGINE = str(data["engine"]).lower()
+        STATE["config"]["engine"] = READ_ENGINE
+    if "range_size_mb" in data:
+        RANGE_SIZE_MB = int(data["range_size_mb"])
+        STATE["config"]["range_size_mb"] = RANGE_SIZE_MB
+    if "scheduler" in data:
+        SCHEDULER = str(data["scheduler"]).lower()
+        STATE["config"]["scheduler"] = SCHEDULER
+    if "prefetch" in data:
+        PREFETCH = str(data["prefetch"]).lower()
+        STATE["config"]["prefetch"] = PREFETCH
+    if "prefetch_window_mb" in data:
+        PREFETCH_WINDOW_MB = int(data["prefetch_window_mb"])
+        STATE["config"]["prefetch_window_mb"] = PREFETCH_WINDOW_MB
+    if "cache_bypass" in data:
+        CACHE_BYPASS = str(data["cache_bypass"]).lower()
+        STATE["config"]["cache_bypass"] = CACHE_BYPASS
+    if "memory_budget_mb" in data:
+        MEMORY_BUDGET_MB = int(data["memory_budget_mb"])
+    if "gcs_part_size_mb" in data:
+        GCS_PART_SIZE_MB = int(data["gcs_part_size_mb"])
+        STATE["config"]["gcs_part_size_mb"] = GCS_PART_SIZE_MB
+    if "gcs_keepalive" in data:
+        GCS_KEEPALIVE = bool(data["gcs_keepalive"])
+        STATE["config"]["gcs_keepalive"] = GCS_KEEPALIVE
+    if "chunk_size_mb" in data:
+        CHUNK_SIZE_MB = int(data["chunk_size_mb"])
+        STATE["config"]["chunk_size_mb"] = CHUNK_SIZE_MB
+    if "threads" in data:
+        NUM_THREADS = int(data["threads"])
+        STATE["config"]["threads"] = NUM_THREADS
+    if "consumer_work" in data:
+        CONSUMER_WORK = str(data["consumer_work"]).lower()
+        STATE["config"]["consumer_work"] = CONSUMER_WORK
+    if "verify" in data:
+        VERIFY = bool(data["verify"])
+        STATE["config"]["verify"] = VERIFY
+    if "mode" in data:
+        if str(data["mode"]).lower() != "stream" and str(data["mode"]).lower() not in BENCHMARK_MODES:
+            raise ValueError(f"Unknown benchmark mode: {data['mode']}")
+        BENCHMARK_MODE = str(data["mode"]).lower()
+        STATE["config"]["mode"] = BENCHMARK_MODE
+    if "access_order" in data:
+        ACCESS_ORDER = data["access_order"] # list of tensor names, or a JSON file path
+    if "write_size_gb" in data:
+        WRITE_SIZE_GB = float(data["write_size_gb"])
+    if "write_files" in data:
+        WRITE_FILES = int(data["write_files"])
+    if "write_layout" in data:
+        WRITE_LAYOUT = str(data["write_layout"]).lower()
+        STATE["config"]["write_layout"] = WRITE_LAYOUT
+    if "write_fsync" in data:
+        WRITE_FSYNC = str(data["write_fsync"]).lower()
+        STATE["config"]["write_fsync"] = WRITE_FSYNC
+    if "write_atomic" in data:
+        WRITE_ATOMIC = bool(data["write_atomic"])
+        STATE["config"]["write_atomic"] = WRITE_ATOMIC
+    if "random_io_kb" in data:
+        RANDOM_IO_KB = int(data["random_io_kb"])
+        STATE["config"]["random_io_kb"] = RANDOM_IO_KB
+    if "random_dist" in data:
+        RANDOM_DIST = str(data["random_dist"]).lower()
+        STATE["config"]["random_dist"] = RANDOM_DIST
+    if "zipf_s" in data:
+        ZIPF_S = float(data["zipf_s"])
+    if "random_duration_sec" in data:
+        RANDOM_DURATION_SEC = float(data["random_duration_sec"])
+        STATE["config"]["random_duration_sec"] = RANDOM_DURATION_SEC
+    if "metadata_max_files" in data:
+        METADATA_MAX_FILES = int(data["metadata_max_files"])
+    if "cache_block_mb" in data:
+        CACHE_BLOCK_MB = int(data["cache_block_mb"])
+    if "cache_capacity_mb" in data:
+        CACHE_CAPACITY_MB = int(data["cache_capacity_mb"])
+    if "cache_passes" in data:
+        CACHE_PASSES = int(data["cache_passes"])
+    if "cache_order" in data:
+        CACHE_ORDER = str(data["cache_order"]).lower()
+    if "stage_range_mb" in data:
+        STAGE_RANGE_MB = int(data["stage_range_mb"])
+    if "stage_keep" in data:
+        STAGE_KEEP = bool(data["stage_keep"])
+
+def current_overrides():
+    return {
+        "synthetic_size_gb": SYNTHETIC_SIZE_GB,
+        "synthetic_content": SYNTHETIC_CONTENT,
+        "engine": READ_ENGINE,
+        "range_size_mb": RANGE_SIZE_MB,
+        "scheduler": SCHEDULER,
+        "prefetch": PREFETCH,
+        "prefetch_window_mb": PREFETCH_WINDOW_MB,
+        "cache_bypass": CACHE_BYPASS,
+        "gcs_part_size_mb": GCS_PART_SIZE_MB,
+        "gcs_keepalive": GCS_KEEPALIVE,
+        "memory_budget_mb": MEMORY_BUDGET_MB,
+        "chunk_size_mb": CHUNK_SIZE_MB,
+        "threads": NUM_THREADS,
+        "consumer_work": CONSUMER_WORK,
+        "verify": VERIFY,
+        "mode": BENCHMARK_MODE,
+        "access_order": ACCESS_ORDER,
+        "write_size_gb": WRITE_SIZE_GB,
+        "write_files": WRITE_FILES,
+        "write_layout": WRITE_LAYOUT,
+        "write_fsync": WRITE_FSYNC,
+        "write_atomic": WRITE_ATOMIC,
+        "random_io_kb": RANDOM_IO_KB,
+        "random_dist": RANDOM_DIST,
+        "zipf_s": ZIPF_S,
+        "random_duration_sec": RANDOM_DURATION_SEC,
+        "metadata_max_files": METADATA_MAX_FILES,
+        "cache_block_mb": CACHE_BLOCK_MB,
+        "cache_capacity_mb": CACHE_CAPACITY_MB,
+        "cache_passes": CACHE_PASSES,
+        "cache_order": CACHE_ORDER,
+        "stage_range_mb": STAGE_RANGE_MB,
+        "stage_keep": STAGE_KEEP,
+    }
+
+# --- Parameter Sweep ---
+def parse_sweep_spec(spec):
+    """Normalizes a sweep spec; every axis defaults to the current config."""
+    if not isinstance(spec, dict):
+        raise TypeError("sweep must be an object")
+    def axis(key, cast, default):
+        values = spec.get(key, [default])
+        if not isinstance(values, list):
+            values = [values]
+        if not values:
+            raise ValueError(f"{key} must not be empty")
+        return [cast(v) for v in values]
+    parsed = {
+        "chunk_size_mb": axis("chunk_size_mb", int, CHUNK_SIZE_MB),
+        "threads": axis("threads", int, NUM_THREADS),
+        "engines": axis("engines", lambda v: str(v).lower(), READ_ENGINE),
+        "repetitions": int(spec.get("repetitions", 1)),
+        "cache": str(spec.get("cache", "drop")).lower(), # drop, keep, warm
+    }
+    if parsed["repetitions"] < 1:
+        raise ValueError("repetitions must be >= 1")
+    if parsed["cache"] not in ("drop", "keep", "warm"):
+        raise ValueError(f"Unknown cache handling: {parsed['cache']}")
+    if any(v < 1 for v in parsed["chunk_size_mb"] + parsed["threads"]):
+        raise ValueError("chunk sizes and thread counts must be >= 1")
+    unknown = [e for e in parsed["engines"] if e not in READ_ENGINES]
+    if unknown:
+        raise ValueError(f"Unknown read engines: {unknown}")
+    return parsed
+
+def sweep_points(spec):
+    return [
+        {"engine": e, "chunk_size_mb": c, "threads": t, "repetition": r}
+        for e in spec["engines"]
+        for c in spec["chunk_size_mb"]
+        for t in spec["threads"]
+        for r in range(spec["repetitions"])
+    ]
+
+def prepare_cache(mode):
+    """Puts the dataset in a known page cache state before a sweep point."""
+    if USE_SYNTHETIC or mode == "keep":
+        return
+    try:
+        files = dataset_files()
+    except FileNotFoundError:
+        return # perform_benchmark reports the missing source
+    for fp in files:
+        fd = os.open(fp, os.O_RDONLY)
+        try:
+            if mode == "drop":
+                drop_cache(fd)
+            else:
+                # warm: read it once so the point measures the page cache
+                buf = bytearray(8 * 1024 * 1024)
+                offset = 0
+                while True:
+                    n = os.preadv(fd, [buf], offset)
+                    if not n: break
+                    offset += n
+        finally:
+            os.close(fd)
+
+def fit_contention(samples):
+    """Fits throughput X(N) = lam * N / (1 + sigma * (N - 1)) (Amdahl-style contention).
+
+    `samples` is a list of (threads, throughput). N / X(N) is linear in
+    N - 1, so ordinary least squares gives intercept 1/lam and slope
+    sigma/lam. Returns None when fewer than two thread counts were measured.
+    """
+    xs = [n - 1 for n, _ in samples]
+    ys = [n / x for n, x in samples if x > 0]
+    if len(set(xs)) < 2 or len(ys) != len(xs):
+        return None
+    mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
+    sxx = sum((x - mx) ** 2 for x in xs)
+    slope = sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / sxx
+    intercept = my - slope * mx
+    if intercept <= 0:
+        return None
+    lam = 1 / intercept
+    sigma = max(0.0, slope / intercept)
+    return {
+        "single_thread_mb_s": lam,
+        "contention": sigma,
+        # Amdahl's ceiling: throughput never exceeds lam / sigma
+        "ceiling_mb_s": (lam / sigma) if sigma > 0 else None,
+    }
+
+def summarize_sweep(results):
+    """Groups sweep results per configuration and picks the best one."""
+    grid = {}
+    for r in results:
+        key = (r["engine"], r["chunk_size_mb"], r["threads"])
+        grid.setdefault(key, []).append(r)
+    rows = []
+    for (engine, chunk_mb, threads), runs in grid.items():
+        ok = [r["throughput_mb_s"] for r in runs if not r["error"]]
+        rows.append({
+            "engine": engine,
+            "chunk_size_mb": chunk_mb,
+            "threads": threads,
+            "runs": len(runs),
+            "errors": len(runs) - len(ok),
+            "mean_mb_s": sum(ok) / len(ok) if ok else None,
+            "min_mb_s": min(ok) if ok else None,
+            "max_mb_s": max(ok) if ok else None,
+        })
+    measured = [row for row in rows if row["mean_mb_s"] is not None]
+    best = max(measured, key=lambda row: row["mean_mb_s"]) if measured else None
+
+    scaling = []
+    for engine, chunk_mb in sorted({(row["engine"], row["chunk_size_mb"]) for row in measured}):
+        series = sorted((row["threads"], row["mean_mb_s"]) for row in measured
+                        if row["engine"] == engine and row["chunk_size_mb"] == chunk_mb)
+        fit = fit_contention(series)
+        base_n, base_x = series[0]
+        scaling.append({
+            "engine": engine,
+            "chunk_size_mb": chunk_mb,
+            "fit": fit,
+            "curve": [
+                {
+                    "threads": n,
+                    "mean_mb_s": x,
+                    # Throughput per thread relative to the smallest thread count
+                    "efficiency": (x / n) / (base_x / base_n) if base_x else None,
+                    "model_mb_s": (fit["single_thread_mb_s"] * n / (1 + fit["contention"] * (n - 1))) if fit else None,
+                }
+                for n, x in series
+            ],
+        })
+    return {"grid": rows, "best": best, "scaling": scaling}
+
+def run_sweep(spec):
+    """Runs every sweep point sequentially in this instance, then restores
+    the baseline config (including the /start overrides) it started from."""
+    saved = current_overrides()
+    points = sweep_points(spec)
+    results = []
+    STATE["sweep"] = {"spec": spec, "completed_points": 0, "total_points": len(points), "results": results}
+    logger.info(f"Starting sweep of {len(points)} points: {spec}")
+    try:
+        for point in points:
+            apply_overrides({"engine": point["engine"], "chunk_size_mb": point["chunk_size_mb"],
+                             "threads": point["threads"]})
+            prepare_cache(spec["cache"])
+            ok = perform_benchmark(in_sweep=True)
+            m = STATE["metrics"]
+            results.append(dict(
+                point,
+                throughput_mb_s=m["throughput_mb_s"] if ok else 0,
+                duration_sec=m["duration_sec"] if ok else 0,
+                total_bytes=m["total_bytes"],
+                cache_label=m["cache"].get("label"),
+                p99_ms=m["read_stats"].get("chunk_read_latency_ms", {}).get("p99"),
+                error=None if ok else STATE["error"],
+            ))
+            STATE["sweep"]["completed_points"] = len(results)
+        STATE["sweep"].update(summarize_sweep(results))
+        best = STATE["sweep"]["best"]
+        if best:
+            logger.info(f"Sweep finished. Best: {best}")
+        STATE["error"] = None
+        STATE["status"] = "completed"
+    except Exception as e:
+        logger.error(f"Sweep failed: {e}")
         STATE["status"] = "error"
         STATE["error"] = str(e)
+    finally:
+        apply_overrides(saved)
+
+# `python server.py stage SRC DST` only copies; it must not also start a benchmark
+STAGE_CLI = __name__ == "__main__" and sys.argv[1:2] == ["stage"]
 
 # Auto-start if configured
-if os.environ.get("AUTO_START", "false").lower() == "true":
-    threading.Thread(target=perform_benchmark).start()
+if os.environ.get("AUTO_START", "false").lower() == "true" and not STAGE_CLI:
+    threading.Thread(target=perform_benchmark, name="benchmark").start()
 
 @app.route("/")
 def health():
@@ -196,20 +3516,206 @@ def start_trigger():
     
     # Allow config overrides
     data = request.json or {}
-    if "synthetic_size_gb" in data:
-        global SYNTHETIC_SIZE_GB
-        SYNTHETIC_SIZE_GB = float(data["synthetic_size_gb"])
-        
-    threading.Thread(target=perform_benchmark).start()
+    if not isinstance(data, dict):
+        return jsonify({"error": "Invalid config: body must be an object"}), 400
+    # The other keys are the sweep's baseline: applied first, so its axes default to them
+    overrides = {k: v for k, v in data.items() if k != "sweep"}
+    previous = current_overrides()
+    try:
+        apply_overrides(overrides)
+    except (TypeError, ValueError) as e:
+        apply_overrides(previous) # all or nothing: undo the keys applied before the bad one
+        return jsonify({"error": f"Invalid config: {e}"}), 400
+    if "sweep" in data:
+        try:
+            spec = parse_sweep_spec(data["sweep"])
+        except (TypeError, ValueError) as e:
+            apply_overrides(previous)
+            return jsonify({"error": f"Invalid sweep: {e}"}), 400
+        STATE["status"] = "running"
+        threading.Thread(target=run_sweep, args=(spec,), name="benchmark").start()
+        return jsonify({"status": "started", "points": len(sweep_points(spec))})
+
+    STATE["sweep"] = None
+    STATE["status"] = "running" # before returning, so /stream never sees the previous run's status
+    threading.Thread(target=perform_benchmark, name="benchmark").start()
     return jsonify({"status": "started"})
 
 @app.route("/report")
 def get_report():
+    if STATE["status"] == "running":
+        STATE["metrics"]["read_stats"] = READ_STATS.summary()
     return jsonify({
         "timestamp": time.time(),
         "state": STATE
     })
 
+def progress_event():
+    """Compact live view of the run for /stream progress events."""
+    threads, _, per_second = READ_STATS.merged()
+    m = STATE["metrics"]
+    elapsed = time.time() - m["start_time"] if m["start_time"] else 0.0
+    # Every mode records its reads (or writes) in READ_STATS; not all of
+    # them publish total_bytes before they finish.
+    bytes_read = sum(t.bytes for t in threads)
+    event = {
+        "timestamp": time.time(),
+        "status": STATE["status"],
+        "mode": STATE["config"]["mode"],
+        "elapsed_sec": elapsed,
+        "bytes_read": bytes_read,
+        "total_bytes": m["total_bytes"],
+        "throughput_mb_s": (bytes_read / 1024**2 / elapsed) if elapsed else 0.0,
+        # Second to last bucket is the most recent complete second.
+        "last_second_mb_s": per_second[-2] / 1024**2 if len(per_second) > 1 else None,
+        "chunks_processed": m["chunks_processed"],
+    }
+    if STATE["sweep"]:
+        event["sweep"] = {k: STATE["sweep"][k] for k in ("completed_points", "total_points")}
+    return event
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@app.route("/stream")
+def stream():
+    """Server-sent events: `progress` every `interval` seconds while a run
+    is going, then one `report` event with the final /report payload."""
+    interval = max(0.1, request.args.get("interval", STREAM_INTERVAL_SEC, type=float))
+
+    def events():
+        while STATE["status"] == "running":
+            yield sse("progress", progress_event())
+            # Wake early when the run ends so the report is not delayed a full interval
+            deadline = time.time() + interval
+            while STATE["status"] == "running" and time.time() < deadline:
+                time.sleep(min(0.05, interval))
+        STATE["metrics"]["read_stats"] = READ_STATS.summary()
+        yield sse("report", {"timestamp": time.time(), "state": STATE})
+
+    return Response(events(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route("/metrics")
+def prometheus_metrics():
+    """Prometheus text exposition of the current (or last) run."""
+    threads, latency, per_second = READ_STATS.merged()
+    m = STATE["metrics"]
+    lines = [
+        "# HELP loader_up_info Benchmark status (1 for the current status label).",
+        "# TYPE loader_up_info gauge",
+        f'loader_up_info{{status="{STATE["status"]}",engine="{STATE["config"]["engine"]}"}} 1',
+        "# HELP loader_bytes_read_total Bytes read by reader threads.",
+        "# TYPE loader_bytes_read_total counter",
+    ]
+    for t in threads:
+        lines.append(f'loader_bytes_read_total{{thread="{t.name}"}} {t.bytes}')
+    lines += [
+        "# HELP loader_bytes_consumed_total Bytes processed by the consumer.",
+        "# TYPE loader_bytes_consumed_total counter",
+        f"loader_bytes_consumed_total {m['total_bytes']}",
+        "# HELP loader_throughput_mb_s Mean throughput since the run started.",
+        "# TYPE loader_throughput_mb_s gauge",
+        f"loader_throughput_mb_s {m['throughput_mb_s']}",
+    ]
+    # Second to last bucket is the most recent complete second.
+    if len(per_second) > 1:
+        lines += [
+            "# HELP loader_last_second_mb_s Read throughput over the last complete second.",
+            "# TYPE loader_last_second_mb_s gauge",
+            f"loader_last_second_mb_s {per_second[-2] / 1024**2}",
+        ]
+    lines += [
+        "# HELP loader_chunk_read_seconds Time to read one chunk.",
+        "# TYPE loader_chunk_read_seconds histogram",
+    ]
+    # Export one bucket per power of two to keep the series count small.
+    cumulative = 0
+    for i, c in enumerate(latency.counts):
+        cumulative += c
+        if i % LatencyHistogram.SUB_BUCKETS == 0:
+            lines.append(f'loader_chunk_read_seconds_bucket{{le="{LatencyHistogram.upper_bound(i):.6g}"}} {cumulative}')
+    lines += [
+        f'loader_chunk_read_seconds_bucket{{le="+Inf"}} {latency.count}',
+        f"loader_chunk_read_seconds_sum {latency.sum}",
+        f"loader_chunk_read_seconds_count {latency.count}",
+    ]
+    return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
+
+# --- Startup Profile ---
+# Splits cold start into container (until the process exists), Python
+# (interpreter, imports, module setup), server (until listening) and
+# storage (until the first byte comes off the mount).
+
+def process_start_time():
+    """Wall-clock time the kernel started this process, or None off Linux."""
+    try:
+        with open("/proc/self/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split() # comm may contain spaces
+        ticks = int(fields[19]) # field 22, starttime, in clock ticks after boot
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        # btime only has whole seconds; the process's age is finer
+        return time.time() - (uptime - ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return None
+
+def first_dataset_file():
+    full_path = os.path.join(MOUNT_PATH, MODEL_FILE)
+    if os.path.isfile(full_path):
+        return full_path
+    for root, _, files in os.walk(full_path):
+        if files:
+            return os.path.join(root, sorted(files)[0])
+    raise FileNotFoundError(f"Source not found: {full_path}")
+
+def probe_first_byte(started):
+    """Reads one byte of the dataset and records when it arrived."""
+    startup = STATE["startup"]
+    try:
+        t0 = time.perf_counter()
+        path = first_dataset_file()
+        with open(path, "rb", buffering=0) as f:
+            f.read(1)
+        startup["first_byte_path"] = path
+        startup["first_byte_read_ms"] = (time.perf_counter() - t0) * 1000
+        startup["first_byte_sec"] = time.time() - started
+    except OSError as e:
+        startup["first_byte_error"] = str(e)
+
+_process_start = process_start_time()
+STATE["startup"] = {
+    "process_start": _process_start,
+    "interpreter_sec": (MODULE_START - _process_start) if _process_start else None,
+    "import_sec": IMPORT_SEC, # lazy imports are added when they happen
+    "module_sec": time.time() - MODULE_START,
+}
+
+def stage_main(argv):
+    """`python server.py stage SRC DST`: the stage copy as a command-line tool."""
+    import argparse
+    parser = argparse.ArgumentParser(prog="server.py stage",
+                                     description="Copy a file or directory from the mount into DST, resuming an interrupted copy.")
+    parser.add_argument("source")
+    parser.add_argument("target", help="directory the source is copied into")
+    parser.add_argument("--threads", type=int, default=NUM_THREADS)
+    parser.add_argument("--range-mb", type=int, default=STAGE_RANGE_MB)
+    parser.add_argument("--chunk-mb", type=int, default=CHUNK_SIZE_MB)
+    args = parser.parse_args(argv)
+    report = stage_copy(args.source, args.target, args.threads, args.range_mb * 1024 * 1024, args.chunk_mb * 1024 * 1024)
+    print(json.dumps(report, indent=2))
+
 if __name__ == "__main__":
+    if STAGE_CLI:
+        stage_main(sys.argv[2:])
+        sys.exit(0)
+    from werkzeug.serving import make_server
     port = int(os.environ.get("PORT", 8080))
-    app.run(host="0.0.0.0", port=port)
+    # make_server binds and listens before returning, unlike app.run
+    server = make_server("0.0.0.0", port, app, threaded=True)
+    started = _process_start or MODULE_START
+    STATE["startup"]["listening_sec"] = time.time() - started
+    logger.info(f"Listening on :{port} {STATE['startup']['listening_sec']:.2f}s after process start")
+    if not USE_SYNTHETIC:
+        threading.Thread(target=probe_first_byte, args=(started,), daemon=True).start()
+    server.serve_forever()
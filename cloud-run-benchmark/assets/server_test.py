@@ -0,0 +1,216 @@
+import json
+import os
+import tempfile
+import unittest
+import zlib
+from unittest import mock
+
+import server
+from server import CRC32_POLY, CRC32C_POLY, HAS_CRC32C, STAGE_MANIFEST, Chunk, ChunkVerifier, ReassemblyTracker, crc32c_value, crc_combine, plan_lpt, stage_copy
+
+
+# Not run automatically in CI; run from this directory with `python -m unittest server_test`.
+class TestCrcCombine(unittest.TestCase):
+
+    def test_matches_crc32_of_whole_buffer(self):
+        data = os.urandom(100_000)
+        for split in (0, 1, 4096, 65_537, len(data)):
+            a, b = data[:split], data[split:]
+            combined = crc_combine(zlib.crc32(a), zlib.crc32(b), len(b), CRC32_POLY)
+            self.assertEqual(combined, zlib.crc32(data), f"split at {split}")
+
+    def test_folds_many_pieces(self):
+        data = os.urandom(10_000)
+        crc = 0
+        for i in range(0, len(data), 777):
+            piece = data[i:i + 777]
+            crc = crc_combine(crc, zlib.crc32(piece), len(piece), CRC32_POLY)
+        self.assertEqual(crc, zlib.crc32(data))
+
+    @unittest.skipUnless(HAS_CRC32C, "google-crc32c not installed")
+    def test_matches_crc32c_of_whole_buffer(self):
+        data = os.urandom(50_000)
+        a, b = data[:12_345], data[12_345:]
+        combined = crc_combine(crc32c_value(a), crc32c_value(b), len(b), CRC32C_POLY)
+        self.assertEqual(combined, crc32c_value(data))
+
+
+class TestChunkVerifier(unittest.TestCase):
+
+    def verify(self, files, chunk_size, expected, skip=()):
+        """Hashes every file in `chunk_size` chunks, leaving out the (path, offset) pairs in `skip`."""
+        verifier = ChunkVerifier(threads=2)
+        for path, data in files.items():
+            for offset in range(0, len(data), chunk_size):
+                if (path, offset) in skip:
+                    continue
+                piece = data[offset:offset + chunk_size]
+                verifier.submit(Chunk(piece, path=path, offset=offset), len(piece))
+        verifier.finish()
+        return verifier.report(expected, {path: len(data) for path, data in files.items()})
+
+    def expected_crcs(self, files):
+        if HAS_CRC32C:
+            return {path: crc32c_value(data) for path, data in files.items()}
+        return {}
+
+    def test_whole_files_verify(self):
+        files = {"a": os.urandom(10_000), "b": os.urandom(3_000), "empty": b""}
+        report = self.verify(files, 1024, self.expected_crcs(files))
+        by_path = {f["path"]: f for f in report["files"]}
+        for path, data in files.items():
+            self.assertTrue(by_path[path]["complete"])
+            self.assertEqual(by_path[path]["crc32"], f"{zlib.crc32(data):08x}")
+        self.assertEqual(report["files_mismatched"], 0)
+        if HAS_CRC32C:
+            self.assertEqual(report["status"], "verified")
+
+    @unittest.skipUnless(HAS_CRC32C, "google-crc32c not installed")
+    def test_corrupt_chunk_fails(self):
+        files = {"a": os.urandom(10_000)}
+        expected = self.expected_crcs(files)
+        files["a"] = files["a"][:5000] + b"x" + files["a"][5001:]
+        report = self.verify(files, 1024, expected)
+        self.assertEqual(report["status"], "failed")
+        self.assertFalse(report["files"][0]["match"])
+
+    def test_hole_or_missing_file_fails(self):
+        files = {"a": os.urandom(10_000), "b": os.urandom(2_000)}
+        expected = {"a": 1, "b": 2, "c": 3} # any value: incomplete files fail before comparing
+        report = self.verify(files, 1024, expected, skip={("a", 2048)})
+        by_path = {f["path"]: f for f in report["files"]}
+        self.assertFalse(by_path["a"]["complete"])
+        self.assertFalse(by_path["a"]["match"])
+        self.assertFalse(by_path["c"]["complete"]) # expected, never read
+        self.assertEqual(report["status"], "failed")
+
+
+class TestPlanLpt(unittest.TestCase):
+
+    def test_covers_every_byte_largest_first(self):
+        sizes = {"big": 10_000, "mid": 3_000, "small": 100, "empty": 0}
+        ranges = plan_lpt(list(sizes), sizes, 0, 1000, 2)
+        lengths = [end - start for _, start, end in ranges]
+        self.assertEqual(lengths, sorted(lengths, reverse=True))
+        for path, size in sizes.items():
+            spans = sorted((start, end) for fp, start, end in ranges if fp == path)
+            covered = 0
+            for start, end in spans:
+                self.assertEqual(start, covered, path) # no gap, no overlap
+                covered = end
+            self.assertEqual(covered, size, path)
+
+    def test_splits_a_large_file_to_a_quarter_share(self):
+        # 13,100 bytes over 2 workers: pieces of at most a quarter share, in whole chunks
+        sizes = {"big": 10_000, "mid": 3_000, "small": 100}
+        ranges = plan_lpt(list(sizes), sizes, 0, 1000, 2)
+        self.assertEqual(max(end - start for _, start, end in ranges), 2000)
+        self.assertEqual(len([r for r in ranges if r[0] == "big"]), 5)
+
+    def test_explicit_range_size(self):
+        sizes = {"a": 2_500}
+        self.assertEqual(plan_lpt(["a"], sizes, 1000, 100, 4), [("a", 0, 1000), ("a", 1000, 2000), ("a", 2000, 2500)])
+
+
+class TestReassemblyTracker(unittest.TestCase):
+
+    def test_in_order_chunks(self):
+        tracker = ReassemblyTracker({"a": 3000, "empty": 0})
+        self.assertEqual(tracker.files_complete, 1) # empty files are complete from the start
+        self.assertFalse(tracker.add("a", 0, 1000))
+        self.assertFalse(tracker.add("a", 1000, 1000))
+        self.assertTrue(tracker.add("a", 2000, 1000))
+        report = tracker.report()
+        self.assertEqual(report["files_complete"], 2)
+        self.assertEqual(report["out_of_order_chunks"], 0)
+        self.assertTrue(report["in_order"])
+
+    def test_out_of_order_chunks_are_parked(self):
+        tracker = ReassemblyTracker({"a": 3000})
+        self.assertFalse(tracker.add("a", 2000, 1000))
+        self.assertFalse(tracker.add("a", 1000, 1000))
+        self.assertEqual(tracker.pending_bytes, 2000)
+        self.assertTrue(tracker.add("a", 0, 1000)) # fills the gap and drains both parked chunks
+        self.assertEqual(tracker.pending_bytes, 0)
+        self.assertEqual(tracker.max_pending_bytes, 2000)
+        self.assertEqual(tracker.report()["out_of_order_chunks"], 2)
+
+    def test_missing_chunk_leaves_file_incomplete(self):
+        tracker = ReassemblyTracker({"a": 3000, "b": 1000})
+        tracker.add("a", 0, 1000)
+        tracker.add("a", 2000, 1000)
+        tracker.add("b", 0, 1000)
+        report = tracker.report()
+        self.assertEqual(report["files_complete"], 1)
+        self.assertFalse(report["in_order"])
+
+
+class TestStageCopy(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name, "model")
+        self.dst = os.path.join(self.tmp.name, "staged")
+        os.makedirs(os.path.join(self.src, "shards"))
+        self.files = {"config.json": os.urandom(100), "shards/0.bin": os.urandom(40_000), "shards/1.bin": os.urandom(9_000)}
+        for rel, data in self.files.items():
+            with open(os.path.join(self.src, rel), "wb") as f:
+                f.write(data)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def copy(self):
+        return stage_copy(self.src, self.dst, threads=1, range_size=4096, chunk_size=1024)
+
+    def assert_identical(self):
+        for rel, data in self.files.items():
+            with open(os.path.join(self.dst, "model", rel), "rb") as f:
+                self.assertEqual(f.read(), data, rel)
+        self.assertFalse(os.path.exists(os.path.join(self.dst, STAGE_MANIFEST)))
+
+    def fail_after(self, calls):
+        """pread_into that raises EIO on its `calls`-th call."""
+        real = server.pread_into
+        count = [0]
+        def pread_into(fd, view, offset):
+            count[0] += 1
+            if count[0] == calls:
+                raise OSError(5, "injected EIO")
+            return real(fd, view, offset)
+        return mock.patch.object(server, "pread_into", pread_into)
+
+    def test_fresh_copy(self):
+        report = self.copy()
+        self.assertEqual(report["copied_bytes"], sum(len(d) for d in self.files.values()))
+        self.assertEqual(report["resumed_bytes"], 0)
+        self.assert_identical()
+
+    def test_resume_after_failure(self):
+        with self.fail_after(20), self.assertRaises(OSError):
+            self.copy()
+        with open(os.path.join(self.dst, STAGE_MANIFEST)) as f:
+            done = sum(end - start for entry in json.load(f).values() for start, end in entry["done"])
+        self.assertGreater(done, 0)
+        report = self.copy()
+        self.assertEqual(report["resumed_bytes"], done)
+        self.assertEqual(report["copied_bytes"] + report["resumed_bytes"], sum(len(d) for d in self.files.values()))
+        self.assert_identical()
+
+    def test_changed_source_is_copied_again(self):
+        with self.fail_after(20), self.assertRaises(OSError):
+            self.copy()
+        with open(os.path.join(self.dst, STAGE_MANIFEST)) as f:
+            self.assertTrue(json.load(f)[os.path.join("model", "shards", "0.bin")]["done"])
+        # Same size, new content and mtime: the ranges recorded for the old file must not be reused
+        path = os.path.join(self.src, "shards", "0.bin")
+        self.files["shards/0.bin"] = os.urandom(40_000)
+        with open(path, "wb") as f:
+            f.write(self.files["shards/0.bin"])
+        os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 10**9))
+        self.copy()
+        self.assert_identical()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,6 +10,7 @@ LOG_FILE="benchmark_run.log"
 REPORT_FILE="benchmark_report.json"
 REPORT_MD="benchmark_report.md"
 TIMESTAMP=$(date +%Y%m%d_%H%M%S)
+SCRIPT_DIR=$(dirname "$0")
 
 # Defaults
 PROJECT_ID=$(gcloud config get-value project)
@@ -31,6 +32,14 @@ TYPE="gcs"
 CLEANUP="true"
 USE_SYNTHETIC="false"
 SYNTHETIC_SIZE_GB="10"
+SYNTHETIC_CONTENT="zeros"
+READ_ENGINE="buffered"
+SCHEDULER="fifo"
+PREFETCH="none"
+SWEEP=""
+VERIFY="false"
+BENCHMARK_MODE="stream"
+STREAM_INTERVAL="2"
 
 # --- Logging Helper ---
 log() {
@@ -76,6 +85,14 @@ case $i in
     --model-file=*) MODEL_FILE="${i#*=}" ;;
     --synthetic) USE_SYNTHETIC="true" ;;
     --size-gb=*) SYNTHETIC_SIZE_GB="${i#*=}" ;;
+    --synthetic-content=*) SYNTHETIC_CONTENT="${i#*=}" ;;
+    --engine=*) READ_ENGINE="${i#*=}" ;;
+    --scheduler=*) SCHEDULER="${i#*=}" ;;
+    --prefetch=*) PREFETCH="${i#*=}" ;;
+    --sweep=*) SWEEP="${i#*=}" ;;
+    --verify) VERIFY="true" ;;
+    --mode=*) BENCHMARK_MODE="${i#*=}" ;;
+    --stream-interval=*) STREAM_INTERVAL="${i#*=}" ;;
     --no-cleanup) CLEANUP="false" ;;
     *) log "ERROR" "Unknown option: $i"; exit 1 ;;
 esac
@@ -92,7 +109,7 @@ if [ -z "$PROJECT_ID" ]; then
 fi
 
 # Type Logic
-ENV_VARS="MOUNT_PATH=${MOUNT_PATH},MODEL_FILE=${MODEL_FILE},USE_SYNTHETIC=${USE_SYNTHETIC},SYNTHETIC_SIZE_GB=${SYNTHETIC_SIZE_GB},PYTHONUNBUFFERED=True"
+ENV_VARS="MOUNT_PATH=${MOUNT_PATH},MODEL_FILE=${MODEL_FILE},USE_SYNTHETIC=${USE_SYNTHETIC},SYNTHETIC_SIZE_GB=${SYNTHETIC_SIZE_GB},SYNTHETIC_CONTENT=${SYNTHETIC_CONTENT},READ_ENGINE=${READ_ENGINE},SCHEDULER=${SCHEDULER},PREFETCH=${PREFETCH},VERIFY=${VERIFY},BENCHMARK_MODE=${BENCHMARK_MODE},PYTHONUNBUFFERED=True"
 VOL_FLAGS=""
 
 if [ "$TYPE" == "gcs" ] || [ "$TYPE" == "gcs-vpc" ]; then
@@ -104,6 +121,7 @@ if [ "$TYPE" == "gcs" ] || [ "$TYPE" == "gcs-vpc" ]; then
     # Or just generic container benchmark?
     # If generic, we don't need volumes.
     if [ ! -z "$BUCKET_NAME" ]; then
+        ENV_VARS="${ENV_VARS},VERIFY_BUCKET=${BUCKET_NAME},GCS_BUCKET=${BUCKET_NAME}"
         VOL_FLAGS="--add-volume=name=gcs-vol,type=cloud-storage,bucket=${BUCKET_NAME} --add-volume-mount=volume=gcs-vol,mount-path=${MOUNT_PATH}"
     fi
 elif [ "$TYPE" == "nfs" ]; then
@@ -157,33 +175,36 @@ log "INFO" "=== Phase 3: Benchmarking ==="
 
 # Trigger Start
 log "INFO" "Triggering benchmark..."
-START_RESP=$(curl -s -X POST "${SERVICE_URL}/start" -H "Content-Type: application/json" -d "{\"synthetic_size_gb\": ${SYNTHETIC_SIZE_GB}}")
+START_BODY="{\"synthetic_size_gb\": ${SYNTHETIC_SIZE_GB}}"
+if [ ! -z "$SWEEP" ]; then
+    START_BODY="{\"synthetic_size_gb\": ${SYNTHETIC_SIZE_GB}, \"sweep\": ${SWEEP}}"
+fi
+START_RESP=$(curl -s -X POST "${SERVICE_URL}/start" -H "Content-Type: application/json" -d "${START_BODY}")
 log "INFO" "Start Response: ${START_RESP}"
 
-# Poll
-log "INFO" "Polling for completion..."
-STATUS="running"
-ATTEMPTS=0
-MAX_ATTEMPTS=120 # 10 minutes (5s interval)
-
-while [ "${STATUS}" == "running" ] || [ "${STATUS}" == "idle" ]; do
-    if [ $ATTEMPTS -gt $MAX_ATTEMPTS ]; then
-        log "ERROR" "Timeout waiting for benchmark."
-        break
-    fi
-    
-    sleep 5
+# Follow progress over server-sent events; returns the instant the run ends
+log "INFO" "Streaming progress..."
+REPORT=$(python3 "${SCRIPT_DIR}/stream_report.py" "${SERVICE_URL}" --interval "${STREAM_INTERVAL}" --timeout 3600 2> >(tee -a "${LOG_FILE}" >&2))
+STREAM_RC=$?
+if [ $STREAM_RC -eq 2 ]; then
+    log "WARN" "Progress stream failed; fetching /report instead."
     REPORT=$(curl -s "${SERVICE_URL}/report")
-    STATUS=$(echo "${REPORT}" | grep -o '"status": *"[^"]*"' | cut -d'"' -f4)
-    SPEED=$(echo "${REPORT}" | grep -o '"throughput_mb_s": *[0-9.]*' | cut -d: -f2 | tr -d ' ')
-    
-    log "INFO" "Status: ${STATUS} | current speed: ${SPEED} MB/s"
-    ATTEMPTS=$((ATTEMPTS+1))
-    
-    if [ "${STATUS}" == "completed" ] || [ "${STATUS}" == "error" ]; then
-        break
-    fi
-done
+fi
+# One value from the report's state, e.g. `report_field metrics.throughput_mb_s`
+report_field() {
+    echo "${REPORT}" | python3 -c '
+import json, sys
+try:
+    value = json.load(sys.stdin)["state"]
+    for key in sys.argv[1].split("."):
+        value = value[key]
+except (ValueError, KeyError, TypeError):
+    value = None
+print("" if value is None else value)' "$1"
+}
+
+STATUS=$(report_field status)
+log "INFO" "Final status: ${STATUS}"
 
 # --- 4. Reporting Phase ---
 log "INFO" "=== Phase 4: Reporting ==="
@@ -191,8 +212,8 @@ echo "${REPORT}" > "${REPORT_FILE}"
 log "INFO" "Saved raw report to ${REPORT_FILE}"
 
 # Generate MD
-SPEED_VAL=$(echo "${REPORT}" | grep -o '"throughput_mb_s": *[0-9.]*' | cut -d: -f2 | tr -d ' ')
-DURATION_VAL=$(echo "${REPORT}" | grep -o '"duration_sec": *[0-9.]*' | cut -d: -f2 | tr -d ' ')
+SPEED_VAL=$(report_field metrics.throughput_mb_s)
+DURATION_VAL=$(report_field metrics.duration_sec)
 
 cat <<EOF > "${REPORT_MD}"
 # Cloud Run Benchmark Report
@@ -205,7 +226,10 @@ cat <<EOF > "${REPORT_MD}"
 - **Duration**: ${DURATION_VAL} s
 
 ## Configuration
-- Synthetic: ${USE_SYNTHETIC} (${SYNTHETIC_SIZE_GB} GB)
+- Synthetic: ${USE_SYNTHETIC} (${SYNTHETIC_SIZE_GB} GB, ${SYNTHETIC_CONTENT})
+- Mode: ${BENCHMARK_MODE}
+- Engine: ${READ_ENGINE} (${SCHEDULER} scheduling, ${PREFETCH} prefetch)
+- Verify: ${VERIFY}
 - Mount: ${MOUNT_PATH}
 - Project: ${PROJECT_ID}
 EOF
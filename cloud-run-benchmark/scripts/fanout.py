@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""Starts one benchmark run on many loader instances at once and aggregates the fleet.
+
+Every instance gets its POST /start in the same instant (threads released
+from one barrier), then each one is followed over /stream. Prints one JSON
+document to stdout: per-instance results, fleet totals (sum, spread, Jain
+fairness) and a fleet-wide throughput timeline. Exits 1 if any run
+failed, 2 if any instance could not be started or its stream broke.
+Standard library only.
+
+    # N service URLs (e.g. the same loader deployed as N services)
+    python3 fanout.py https://a.run.app https://b.run.app --config '{"engine": "ranged"}' > fleet.json
+    # N local server.py processes on consecutive ports, no GCP needed
+    python3 fanout.py --local 4 --env MOUNT_PATH=/data --env MODEL_FILE=model.bin > fleet.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+from stream_report import events, log
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVER = os.path.join(SCRIPT_DIR, "..", "assets", "server.py")
+
+def launch_local(count, base_port, env_overrides):
+    """Starts `count` server.py processes; returns (urls, processes)."""
+    env = dict(os.environ, **env_overrides)
+    urls, procs = [], []
+    for i in range(count):
+        port = base_port + i
+        workdir = tempfile.mkdtemp(prefix=f"fanout-{port}-") # server.log is written to the cwd
+        with open(os.path.join(workdir, "stdout.log"), "wb") as out:
+            procs.append(subprocess.Popen([sys.executable, os.path.abspath(SERVER)], cwd=workdir,
+                                          env=dict(env, PORT=str(port)), stdout=out, stderr=subprocess.STDOUT))
+        urls.append(f"http://127.0.0.1:{port}")
+        log(f"Instance {i}: {urls[-1]} (logs in {workdir})")
+    return urls, procs
+
+def wait_ready(url, timeout):
+    deadline = time.time() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(f"{url}/", timeout=5):
+                return
+        except OSError:
+            if time.time() > deadline:
+                raise
+            time.sleep(0.2)
+
+class Instance:
+    """One loader: triggers its run, then records progress and the final report."""
+
+    def __init__(self, index, url):
+        self.index = index
+        self.url = url.rstrip("/")
+        self.triggered_at = None
+        self.samples = [] # (timestamp, bytes_read)
+        self.report = None
+        self.error = None
+
+    def run(self, barrier, config, interval, timeout):
+        try:
+            body = json.dumps(config).encode()
+            req = urllib.request.Request(f"{self.url}/start", data=body, method="POST",
+                                         headers={"Content-Type": "application/json"})
+            barrier.wait()
+            self.triggered_at = time.time()
+            with urllib.request.urlopen(req, timeout=30) as resp:
+                resp.read()
+            with urllib.request.urlopen(f"{self.url}/stream?interval={interval}", timeout=max(30, interval * 5)) as resp:
+                deadline = time.time() + timeout
+                for event, data in events(resp):
+                    payload = json.loads(data)
+                    if event == "progress":
+                        self.samples.append((payload["timestamp"], payload["bytes_read"]))
+                    elif event == "report":
+                        self.report = payload["state"]
+                        # Close the timeline: progress events stop before the last bytes land
+                        self.samples.append((payload["timestamp"], max(self.bytes_read(), self.report["metrics"]["total_bytes"])))
+                        return
+                    if time.time() > deadline:
+                        raise TimeoutError("timed out waiting for the run")
+            raise ValueError("stream ended without a report")
+        except (OSError, ValueError, threading.BrokenBarrierError) as e:
+            self.error = str(e)
+
+    def bytes_read(self):
+        return self.samples[-1][1] if self.samples else 0
+
+    def summary(self):
+        m = self.report["metrics"] if self.report else {}
+        return {
+            "index": self.index,
+            "url": self.url,
+            "status": self.report["status"] if self.report else "unreachable",
+            "error": self.error or (self.report or {}).get("error"),
+            "triggered_at": self.triggered_at,
+            "start_time": m.get("start_time"),
+            "end_time": m.get("end_time"),
+            "duration_sec": m.get("duration_sec"),
+            "total_bytes": m.get("total_bytes"),
+            "throughput_mb_s": m.get("throughput_mb_s"),
+            "p99_chunk_ms": m.get("read_stats", {}).get("chunk_read_latency_ms", {}).get("p99"),
+            "bottleneck": m.get("resources", {}).get("verdict"),
+        }
+
+def jain_fairness(values):
+    """(sum x)^2 / (n * sum x^2): 1.0 when every instance got the same share, 1/n when one got it all."""
+    squares = sum(v * v for v in values)
+    return sum(values) ** 2 / (len(values) * squares) if squares else None
+
+def fleet_summary(results):
+    done = [r for r in results if r["status"] == "completed" and r["throughput_mb_s"] is not None]
+    rates = [r["throughput_mb_s"] for r in done]
+    summary = {"instances": len(results), "completed": len(done)}
+    if not rates:
+        return summary
+    first_start = min(r["start_time"] for r in done)
+    last_end = max(r["end_time"] for r in done)
+    triggers = [r["triggered_at"] for r in results if r["triggered_at"]]
+    summary.update({
+        "sum_throughput_mb_s": sum(rates),
+        # Fleet bytes over the fleet's wall clock, stragglers included
+        "aggregate_throughput_mb_s": (sum(r["total_bytes"] for r in done) / 1024**2) / (last_end - first_start)
+                                     if last_end > first_start else None,
+        "wall_sec": last_end - first_start,
+        "min_mb_s": min(rates),
+        "median_mb_s": statistics.median(rates),
+        "max_mb_s": max(rates),
+        "stdev_mb_s": statistics.pstdev(rates),
+        "spread": max(rates) / min(rates) if min(rates) else None,
+        "jain_fairness": jain_fairness(rates),
+        "slowest_finish_sec": max(r["duration_sec"] for r in done),
+        "trigger_skew_ms": (max(triggers) - min(triggers)) * 1000 if triggers else None,
+    })
+    return summary
+
+def timeline(instances, interval):
+    """Fleet MB/s per `interval` bucket, from each instance's progress samples."""
+    samples = [s for inst in instances for s in inst.samples]
+    if not samples:
+        return []
+    t0 = min(t for t, _ in samples)
+    buckets = {}
+    for inst in instances:
+        prev_bytes = 0
+        for t, n in inst.samples:
+            if n > prev_bytes:
+                b = int((t - t0) // interval)
+                buckets[b] = buckets.get(b, 0) + n - prev_bytes
+            prev_bytes = n
+    return [{"t_sec": round(b * interval, 3), "fleet_mb_s": buckets.get(b, 0) / 1024**2 / interval}
+            for b in range(max(buckets) + 1)] if buckets else []
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("urls", nargs="*", help="Loader base URLs")
+    parser.add_argument("--local", type=int, default=0, help="Launch this many local server.py processes instead")
+    parser.add_argument("--base-port", type=int, default=8090, help="First port for --local instances")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="Environment for --local instances")
+    parser.add_argument("--config", default="{}", help="JSON body for POST /start (overrides or a sweep)")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between progress events")
+    parser.add_argument("--timeout", type=float, default=3600, help="Give up on an instance after this many seconds")
+    args = parser.parse_args()
+    if bool(args.urls) == bool(args.local):
+        parser.error("pass either instance URLs or --local N")
+    config = json.loads(args.config)
+
+    procs = []
+    try:
+        urls = args.urls
+        if args.local:
+            urls, procs = launch_local(args.local, args.base_port, dict(kv.split("=", 1) for kv in args.env))
+        for url in urls:
+            wait_ready(url.rstrip("/"), timeout=120 if procs else 30)
+
+        instances = [Instance(i, url) for i, url in enumerate(urls)]
+        barrier = threading.Barrier(len(instances))
+        threads = [threading.Thread(target=inst.run, args=(barrier, config, args.interval, args.timeout), daemon=True)
+                   for inst in instances]
+        log(f"Starting {len(instances)} instances.")
+        for t in threads:
+            t.start()
+        while any(t.is_alive() for t in threads):
+            time.sleep(args.interval)
+            running = [inst for inst in instances if inst.report is None and inst.error is None]
+            log(f"{len(instances) - len(running)}/{len(instances)} done | "
+                f"{sum(inst.bytes_read() for inst in instances) / 1024**3:.2f} GB read across the fleet")
+        results = [inst.summary() for inst in instances]
+        fleet = fleet_summary(results)
+        print(json.dumps({"fleet": fleet, "instances": results, "timeline": timeline(instances, args.interval)}))
+        if fleet.get("completed"):
+            log(f"Fleet: {fleet['sum_throughput_mb_s']:.1f} MB/s summed, spread {fleet['spread'] or 0:.2f}x, "
+                f"Jain fairness {fleet['jain_fairness']:.3f}")
+    except OSError as e:
+        log(f"Fan-out failed: {e}")
+        return 2
+    finally:
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            p.wait()
+
+    if any(inst.error for inst in instances):
+        return 2
+    return 1 if any(r["status"] == "error" for r in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Follows a benchmark run over the loader's /stream endpoint.
+
+Logs each progress event to stderr and prints the final /report JSON to
+stdout the moment the run ends. Exits 1 if the run failed, 2 if the
+stream broke or timed out. Standard library only, so it runs anywhere
+the benchmark script does.
+
+    python3 stream_report.py https://SERVICE_URL [--interval 1] [--timeout 3600] > report.json
+"""
+import argparse
+import json
+import sys
+import time
+import urllib.request
+
+def events(resp):
+    """Yields (event, data) pairs from a text/event-stream response."""
+    event, data = "message", []
+    for raw in resp:
+        line = raw.decode("utf-8").rstrip("\r\n")
+        if not line:
+            if data:
+                yield event, "\n".join(data)
+            event, data = "message", []
+        elif line.startswith(":"):
+            continue # comment / keep-alive
+        else:
+            field, _, value = line.partition(":")
+            value = value[1:] if value.startswith(" ") else value
+            if field == "event":
+                event = value
+            elif field == "data":
+                data.append(value)
+
+def log(msg):
+    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] [INFO] {msg}", file=sys.stderr, flush=True)
+
+def describe(p):
+    msg = f"Status: {p['status']} | {p['elapsed_sec']:.1f}s | {p['bytes_read'] / 1024**3:.2f} GB | mean {p['throughput_mb_s']:.1f} MB/s"
+    if p.get("last_second_mb_s") is not None:
+        msg += f" | last second {p['last_second_mb_s']:.1f} MB/s"
+    if p.get("sweep"):
+        msg += f" | sweep point {p['sweep']['completed_points'] + 1}/{p['sweep']['total_points']}"
+    return msg
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("url", help="Service base URL")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between progress events")
+    parser.add_argument("--timeout", type=float, default=3600, help="Give up after this many seconds")
+    args = parser.parse_args()
+
+    url = f"{args.url.rstrip('/')}/stream?interval={args.interval}"
+    try:
+        # The socket timeout only has to outlast the gap between two events
+        with urllib.request.urlopen(url, timeout=max(30, args.interval * 5)) as resp:
+            deadline = time.time() + args.timeout
+            for event, data in events(resp):
+                payload = json.loads(data)
+                if event == "progress":
+                    log(describe(payload))
+                elif event == "report":
+                    print(json.dumps(payload))
+                    return 1 if payload["state"]["status"] == "error" else 0
+                if time.time() > deadline:
+                    log("Timeout waiting for benchmark.")
+                    return 2
+    except (OSError, ValueError) as e:
+        log(f"Stream failed: {e}")
+        return 2
+    log("Stream ended without a report.")
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(main())